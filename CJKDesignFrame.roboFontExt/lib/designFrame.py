@@ -0,0 +1,187 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import json
+import numbers
+from typing import NamedTuple
+
+SETTINGS_KEY = "CJKDesignFrameSettings"
+SCHEMA_VERSION = 1
+
+class DesignFrameError(ValueError):
+    pass
+
+class CustomFrame(NamedTuple):
+    name: str
+    value: float
+
+def _number(name: str, value, low: float = None, high: float = None):
+    if isinstance(value, bool) or not isinstance(value, numbers.Real):
+        raise DesignFrameError(f"{name} must be a number, not {value!r}")
+    if low is not None and value < low:
+        raise DesignFrameError(f"{name} must be at least {low}, not {value!r}")
+    if high is not None and value > high:
+        raise DesignFrameError(f"{name} must be at most {high}, not {value!r}")
+    return value
+
+def _pair(name: str, value, low: float = None, high: float = None) -> tuple:
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise DesignFrameError(f"{name} must be a pair of numbers, not {value!r}")
+    return tuple(_number(name, v, low, high) for v in value)
+
+def _positions(name: str, value) -> tuple:
+    if not isinstance(value, (list, tuple)):
+        raise DesignFrameError(f"{name} must be a list of numbers, not {value!r}")
+    return tuple(_number(name, v, 0, 100) for v in value)
+
+def _customsFrames(name: str, value) -> tuple:
+    if not isinstance(value, (list, tuple)):
+        raise DesignFrameError(f"{name} must be a list, not {value!r}")
+    frames = []
+    for frame in value:
+        if isinstance(frame, CustomFrame):
+            frames.append(frame)
+            continue
+        if not isinstance(frame, dict):
+            raise DesignFrameError(f"{name} entries must be dicts, not {frame!r}")
+        if "Value" not in frame: continue
+        frames.append(CustomFrame(str(frame.get("Name", "")), _number(name, frame["Value"], 0, 100)))
+    return tuple(frames)
+
+class DesignFrame:
+    """
+    Frozen design frame settings. Instances are validated on creation,
+    compare and hash by value, and `key` is stable across processes, so a
+    design frame can be used as a cache key. Use `replace` or
+    `designFrameFromLib` to get modified settings.
+    """
+
+    __slots__ = "em_Dimension", "characterFace", "overshoot", "shift", \
+                "customsFrames", "_key", "__weakref__"
+
+    type = None
+    _fields = {
+        "em_Dimension": ((1000, 1000), lambda name, v: _pair(name, v, 1)),
+        "characterFace": (90, lambda name, v: _number(name, v, 0, 100)),
+        "overshoot": ((20, 20), lambda name, v: _pair(name, v, 0)),
+        "shift": ((0, 0), _pair),
+        "customsFrames": ((), _customsFrames),
+        }
+
+    def __init__(self, **values):
+        for name, (default, validate) in self._fields.items():
+            object.__setattr__(self, name, validate(name, values.pop(name, default)))
+        if values:
+            raise DesignFrameError(f"unknown {self.type} design frame settings: {', '.join(sorted(values))}")
+        lib = self.get()
+        object.__setattr__(self, "_key", hashlib.sha1(json.dumps(lib, sort_keys = True).encode("utf-8")).hexdigest())
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable, use replace()")
+
+    __delattr__ = __setattr__
+
+    def get(self) -> dict:
+        """
+        Returns a new lib dict of the settings.
+        """
+        lib = {}
+        for name in self._fields:
+            value = getattr(self, name)
+            if name == "customsFrames":
+                value = [{"Name": frame.name, "Value": frame.value} for frame in value]
+            elif isinstance(value, tuple):
+                value = list(value)
+            lib[name] = value
+        lib["type"] = self.type
+        lib["version"] = SCHEMA_VERSION
+        return lib
+
+    def replace(self, **values):
+        return designFrameFromLib({**self.get(), **values})
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, DesignFrame):
+            return NotImplemented
+        return self._key == other._key
+
+    def __hash__(self) -> int:
+        return hash(self._key)
+
+    def __len__(self) -> int:
+        lib = self.get()
+        return len(list(filter(lambda x: lib[x], lib)))
+
+    def __str__(self) -> str:
+        str = ""
+        for k, v in self.get().items():
+            str += f"{k}:{v}, "
+        return str
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self._key[:8]}>"
+
+class HanDesignFrame(DesignFrame):
+
+    __slots__ = "horizontalLine", "verticalLine"
+
+    type = 'han'
+    _fields = {
+        **DesignFrame._fields,
+        "horizontalLine": (15, lambda name, v: _number(name, v, 0, 100)),
+        "verticalLine": (15, lambda name, v: _number(name, v, 0, 100)),
+        }
+
+class HangulDesignFrame(DesignFrame):
+
+    __slots__ = "horizontalLine", "verticalLine", "horizontalGrid", "verticalGrid"
+
+    type = 'hangul'
+    _fields = {
+        **DesignFrame._fields,
+        "horizontalLine": (8, lambda name, v: _number(name, v, 0)),
+        "verticalLine": (8, lambda name, v: _number(name, v, 0)),
+        "horizontalGrid": ((), _positions),
+        "verticalGrid": ((), _positions),
+        }
+
+DESIGN_FRAME_TYPES = {frameClass.type: frameClass for frameClass in (HanDesignFrame, HangulDesignFrame)}
+
+def designFrameFromLib(lib: dict) -> DesignFrame:
+    """
+    Returns the design frame of the settings `lib`, as stored in the font
+    lib or in a .CJKDesignFrameSettings file. Raises `DesignFrameError` if
+    the settings are invalid.
+    """
+    lib = dict(lib or {})
+    if not isinstance(lib.get("version", SCHEMA_VERSION), int) or lib.get("version", SCHEMA_VERSION) > SCHEMA_VERSION:
+        raise DesignFrameError(f"unsupported settings version {lib['version']!r}, expected {SCHEMA_VERSION} or lower")
+    lib.pop("version", None)
+    frameClass = DESIGN_FRAME_TYPES.get(lib.pop("type", "han"))
+    if frameClass is None:
+        raise DesignFrameError(f"unknown design frame type, expected one of {', '.join(DESIGN_FRAME_TYPES)}")
+    # settings of the other frame types are left over when switching types
+    known = {name for otherClass in DESIGN_FRAME_TYPES.values() for name in otherClass._fields}
+    values = {name: value for name, value in lib.items() if name in frameClass._fields or name not in known}
+    return frameClass(**values)
@@ -0,0 +1,280 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Font-wide design frame conformance audit.
+
+    python designFrameAudit.py MyFont.ufo --workers 8 > report.jsonl
+
+Every glyph whose outlines leave the overshoot band around the character
+face, including between on-curve points at the extrema of its curves, or
+have on-curve points just missing the overshoot band or the
+second lines, is written to stdout as one JSON object per line.
+
+Results are cached next to the UFO, keyed by a hash of each glyph's
+outline and of the frame settings, so a rerun only audits the glyphs
+that changed. With `--watch`, the glyph directory is then polled and
+modified glyphs are re-audited as they are saved.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import designFrameCache
+import designFrameExtrema
+import designFrameProximity
+import designFrameUFO
+from designFrame import designFrameFromLib
+
+# part of the settings key of the cached results, bump when issues change
+AUDIT_VERSION = 2
+
+def auditPoints(points: np.ndarray, onCurve: np.ndarray, edges: dict, tolerance: int = 3, extremes: np.ndarray = None) -> list:
+    """
+    Returns the issues found for a glyph, `points` being all its points as
+    a `(n, 2)` array and `onCurve` the mask of its on-curve points.
+    `extremes` are the points where the outline reaches its bounds, see
+    `designFrameExtrema.extremePoints`, all the `points` by default.
+    """
+    if not len(points):
+        return []
+    issues = designFrameExtrema.overshootIssues(points if extremes is None else extremes, edges)
+
+    onCurvePoints = points[onCurve]
+    flags = designFrameProximity.classifyPoints(onCurvePoints, edges, tolerance)
+    for flag, issueType in [
+            (designFrameProximity.NEAR_OVERSHOOT, "nearOvershoot"),
+            (designFrameProximity.NEAR_SECOND_LINE, "missesSecondLine"),
+            ]:
+        selected = onCurvePoints[(flags & flag) != 0]
+        if len(selected):
+            issues.append(dict(type = issueType, points = selected.tolist()))
+    return issues
+
+def auditContours(contours: list, edges: dict, tolerance: int = 3) -> list:
+    points = designFrameUFO.contoursToArray(contours)
+    onCurve = np.array([segmentType is not None for contour in contours for x, y, segmentType in contour], dtype=bool)
+    return auditPoints(points, onCurve, edges, tolerance, designFrameExtrema.extremePoints(contours))
+
+_worker = {}
+
+def _initWorker(path: str, settings: dict, tolerance: int):
+    _worker["glyphSet"] = designFrameUFO.openFont(path).getGlyphSet()
+    _worker["edges"] = designFrameProximity.proximityEdges(designFrameFromLib(settings))
+    _worker["tolerance"] = tolerance
+
+def _auditChunk(glyphNames: list) -> list:
+    results = []
+    for glyphName in glyphNames:
+        contours = designFrameUFO.readContours(_worker["glyphSet"], glyphName)
+        issues = auditContours(contours, _worker["edges"], _worker["tolerance"])
+        results.append(dict(glyph = glyphName, issues = issues))
+    return results
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def auditFont(path: str, 
+        glyphNames: list = None, 
+        settings: dict = None, 
+        tolerance: int = 3, 
+        workers: int = None, 
+        chunkSize: int = 200):
+    """
+    Audits the glyphs of the UFO at `path` in a process pool and yields
+    one `dict(glyph, issues)` per glyph, in `glyphNames` order.
+    """
+    reader = designFrameUFO.openFont(path)
+    if settings is None:
+        settings = designFrameUFO.readSettings(reader)
+    if glyphNames is None:
+        glyphNames = sorted(reader.getGlyphSet().keys())
+    initargs = (path, settings, tolerance)
+    if workers == 1:
+        _initWorker(*initargs)
+        for chunk in _chunks(glyphNames, chunkSize):
+            yield from _auditChunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers = workers, initializer = _initWorker, initargs = initargs) as executor:
+        for results in executor.map(_auditChunk, _chunks(glyphNames, chunkSize)):
+            yield from results
+
+class IncrementalAudit:
+    """
+    Audits a UFO through a persistent `GlyphResultCache`, only auditing
+    the glyphs whose outline hash is not in the cache.
+    """
+
+    def __init__(self, 
+            path: str, 
+            settings: dict = None, 
+            tolerance: int = 3, 
+            cachePath: str = None):
+        self.path = path
+        self.tolerance = tolerance
+        self.cachePath = cachePath or designFrameCache.defaultCachePath(path, "designFrameAudit")
+        self._settings = settings
+        self.reader = designFrameUFO.openFont(path)
+        self.glyphSet = self.reader.getGlyphSet()
+        self.hasher = designFrameUFO.GlyphHasher(self.glyphSet)
+        self.cache = None
+        self.reloadSettings()
+
+    def reloadSettings(self) -> bool:
+        """
+        Reads the settings again from the font lib, returns True if they
+        changed.
+        """
+        settings = self._settings
+        if settings is None:
+            settings = designFrameUFO.readSettings(self.reader)
+        key = designFrameCache.settingsKey(designFrameFromLib(settings), tolerance = self.tolerance, version = AUDIT_VERSION)
+        if self.cache is not None and self.cache.settingsKey == key:
+            return False
+        self.settings = settings
+        self.cache = designFrameCache.GlyphResultCache(self.cachePath, key)
+        self.cache.prune(self.glyphSet.keys())
+        return True
+
+    def reloadGlyphSet(self) -> list:
+        """
+        Reads the glyph set contents again, returns the names of the
+        glyphs added or removed.
+        """
+        previous = set(self.glyphSet.keys())
+        self.glyphSet = self.reader.getGlyphSet()
+        self.hasher.glyphSet = self.glyphSet
+        current = set(self.glyphSet.keys())
+        self.cache.prune(current)
+        return sorted(self.hasher.forget(previous ^ current) & current)
+
+    def changed(self, glyphNames) -> list:
+        """
+        Returns the glyphs to audit again after `glyphNames` were
+        modified, composites using them included.
+        """
+        return sorted(self.hasher.forget(glyphNames) & set(self.glyphSet.keys()))
+
+    def run(self, glyphNames: list = None, workers: int = None, chunkSize: int = 200):
+        if glyphNames is None:
+            glyphNames = sorted(self.glyphSet.keys())
+        stale = []
+        for glyphName in glyphNames:
+            issues = self.cache.get(glyphName, self.hasher.hash(glyphName))
+            if issues is None:
+                stale.append(glyphName)
+            else:
+                yield dict(glyph = glyphName, issues = issues)
+        if not stale: return
+        try:
+            for result in auditFont(self.path, stale, self.settings, self.tolerance, workers, chunkSize):
+                self.cache.set(result["glyph"], self.hasher.hash(result["glyph"]), result["issues"])
+                yield result
+        finally:
+            self.cache.save()
+
+def _fileStamps(path: str) -> dict:
+    stamps = {}
+    for entry in os.scandir(designFrameUFO.glyphsDirectory(path)):
+        if entry.name.endswith(".glif") or entry.name == "contents.plist":
+            stamps[entry.name] = entry.stat().st_mtime_ns
+    libPath = os.path.join(path, "lib.plist")
+    if os.path.exists(libPath):
+        stamps["lib.plist"] = os.stat(libPath).st_mtime_ns
+    return stamps
+
+def watch(audit: IncrementalAudit, interval: float = 1., workers: int = 1):
+    """
+    Yields the results of a first incremental pass, then polls the glyph
+    directory every `interval` seconds and yields the results of the
+    glyphs modified since the last poll.
+    """
+    stamps = _fileStamps(audit.path)
+    yield from audit.run(workers = workers)
+    while True:
+        time.sleep(interval)
+        current = _fileStamps(audit.path)
+        modified = {name for name in set(stamps) | set(current) if stamps.get(name) != current.get(name)}
+        stamps = current
+        if not modified: continue
+        if "lib.plist" in modified and audit.reloadSettings():
+            yield from audit.run(workers = workers)
+            continue
+        glyphNames = []
+        if "contents.plist" in modified:
+            glyphNames.extend(audit.reloadGlyphSet())
+        fileNames = designFrameUFO.readGlyphFileNames(audit.path)
+        glyphNames.extend(audit.changed(fileNames[name] for name in modified if name in fileNames))
+        yield from audit.run(sorted(set(glyphNames)), workers = workers)
+
+def main(args = None) -> int:
+    parser = argparse.ArgumentParser(description = "Audit a UFO against its CJK design frame.")
+    parser.add_argument("ufo", help = "path of the UFO to audit")
+    parser.add_argument("--settings", help = "a .CJKDesignFrameSettings file to use instead of the font lib")
+    parser.add_argument("--glyphs", nargs = "*", help = "glyph names to audit (default: all)")
+    parser.add_argument("--tolerance", type = int, default = 3, help = "proximity tolerance in FU (default: 3)")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "number of worker processes")
+    parser.add_argument("--chunk-size", type = int, default = 200, help = "glyphs per worker task")
+    parser.add_argument("--all", action = "store_true", help = "also report glyphs without issues")
+    parser.add_argument("--cache", help = "result cache file (default: next to the UFO)")
+    parser.add_argument("--no-cache", action = "store_true", help = "audit every glyph, without reading or writing the cache")
+    parser.add_argument("--watch", action = "store_true", help = "keep polling the UFO and re-audit modified glyphs")
+    parser.add_argument("--interval", type = float, default = 1., help = "polling interval in seconds (default: 1)")
+    options = parser.parse_args(args)
+
+    settings = None
+    if options.settings:
+        with open(options.settings, 'r', encoding = "utf-8") as file:
+            settings = json.load(file)
+
+    if options.no_cache:
+        results = auditFont(options.ufo, options.glyphs, settings, options.tolerance, options.workers, options.chunk_size)
+    else:
+        audit = IncrementalAudit(options.ufo, settings, options.tolerance, options.cache)
+        if options.watch:
+            results = watch(audit, options.interval, options.workers)
+        else:
+            results = audit.run(options.glyphs, options.workers, options.chunk_size)
+
+    failures = 0
+    reported = set()
+    try:
+        for result in results:
+            if result["issues"]:
+                failures += 1
+                reported.add(result["glyph"])
+            elif options.watch and result["glyph"] in reported:
+                reported.discard(result["glyph"])
+            elif not options.all:
+                continue
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Persistent per-glyph result cache for the batch tools.
+
+Results are stored in a JSON file along with the glyph hash they were
+computed from (see `designFrameUFO.GlyphHasher`). The whole file is
+discarded when the settings key it was written with changes.
+"""
+
+import hashlib
+import json
+import os
+
+CACHE_VERSION = 1
+
+def settingsKey(designFrame, **options) -> str:
+    """
+    Returns a stable key for the `designFrame` settings and the extra
+    `options` a result depends on.
+    """
+    data = dict(settings = designFrame.key, options = options)
+    return hashlib.sha1(json.dumps(data, sort_keys = True).encode("utf-8")).hexdigest()
+
+class GlyphResultCache:
+
+    def __init__(self, path: str, settingsKey: str):
+        self.path = path
+        self.settingsKey = settingsKey
+        self.entries = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding = "utf-8") as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == CACHE_VERSION and data.get("settings") == settingsKey:
+                self.entries = data.get("entries", {})
+
+    def get(self, glyphName: str, glyphHash: str):
+        entry = self.entries.get(glyphName)
+        if entry is None or entry["hash"] != glyphHash:
+            return None
+        return entry["result"]
+
+    def set(self, glyphName: str, glyphHash: str, result):
+        self.entries[glyphName] = dict(hash = glyphHash, result = result)
+        self._dirty = True
+
+    def prune(self, glyphNames):
+        glyphNames = set(glyphNames)
+        for glyphName in [name for name in self.entries if name not in glyphNames]:
+            del self.entries[glyphName]
+            self._dirty = True
+
+    def save(self):
+        if not self.path or not self._dirty: return
+        data = dict(version = CACHE_VERSION, settings = self.settingsKey, entries = self.entries)
+        temporaryPath = self.path + ".tmp"
+        with open(temporaryPath, 'w', encoding = "utf-8") as file:
+            json.dump(data, file)
+        os.replace(temporaryPath, self.path)
+        self._dirty = False
+
+def defaultCachePath(ufoPath: str, name: str) -> str:
+    return os.path.normpath(ufoPath) + f".{name}.json"
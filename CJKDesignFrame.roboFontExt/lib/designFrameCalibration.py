@@ -0,0 +1,228 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Font-wide statistics to calibrate the design frame settings.
+
+    python designFrameCalibration.py MyFont.ufo [--write MyFont.CJKDesignFrameSettings]
+
+The bounding box and the horizontal and vertical stem edges of every
+glyph are loaded into NumPy arrays (cached per glyph next to the UFO),
+then the distributions of the bounds and the clusters of stem positions
+are used to suggest `characterFace`, `overshoot`, `shift`,
+`horizontalLine` and `verticalLine`.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.pens.pointPen import PointToSegmentPen
+
+import designFrameCache
+import designFrameUFO
+from designFrame import designFrameFromLib
+
+CALIBRATION_KEY = "designFrameCalibration-1"
+PERCENTILES = (1, 5, 10, 25, 50, 75, 90, 95, 99)
+
+def glyphMeasures(contours: list) -> dict:
+    """
+    Returns the bounds of `contours` and the positions of their
+    horizontal (`stemsY`) and vertical (`stemsX`) straight edges.
+    """
+    pen = BoundsPen(None)
+    designFrameUFO.drawContours(contours, PointToSegmentPen(pen))
+    stemsX, stemsY = [], []
+    for contour in contours:
+        for (x0, y0, type0), (x1, y1, type1) in zip(contour, contour[1:] + contour[:1]):
+            if type0 is None or type1 not in ("line", "move"): continue
+            if y0 == y1 and x0 != x1:
+                stemsY.append(y0)
+            elif x0 == x1 and y0 != y1:
+                stemsX.append(x0)
+    return dict(bounds = pen.bounds, stemsX = stemsX, stemsY = stemsY)
+
+_worker = {}
+
+def _initWorker(path: str):
+    _worker["glyphSet"] = designFrameUFO.openFont(path).getGlyphSet()
+
+def _measureChunk(glyphNames: list) -> list:
+    return [(glyphName, glyphMeasures(designFrameUFO.readContours(_worker["glyphSet"], glyphName))) for glyphName in glyphNames]
+
+def loadMeasures(path: str, glyphNames: list = None, workers: int = None, cachePath: str = None, chunkSize: int = 500) -> dict:
+    """
+    Returns the measures of the glyphs of the UFO at `path` as arrays:
+    `names`, `bounds` (n, 4), `stemsX` and `stemsY`. Measures are cached
+    per glyph hash, so only modified glyphs are read again.
+    """
+    glyphSet = designFrameUFO.openFont(path).getGlyphSet()
+    if glyphNames is None:
+        glyphNames = sorted(glyphSet.keys())
+    hasher = designFrameUFO.GlyphHasher(glyphSet)
+    cache = designFrameCache.GlyphResultCache(
+        cachePath or designFrameCache.defaultCachePath(path, "designFrameCalibration"), 
+        CALIBRATION_KEY
+        )
+    measures = {}
+    stale = []
+    for glyphName in glyphNames:
+        result = cache.get(glyphName, hasher.hash(glyphName))
+        if result is None:
+            stale.append(glyphName)
+        else:
+            measures[glyphName] = result
+    if stale:
+        chunks = [stale[i:i + chunkSize] for i in range(0, len(stale), chunkSize)]
+        if workers == 1 or len(chunks) == 1:
+            _initWorker(path)
+            results = list(map(_measureChunk, chunks))
+        else:
+            with ProcessPoolExecutor(max_workers = workers, initializer = _initWorker, initargs = (path,)) as executor:
+                results = list(executor.map(_measureChunk, chunks))
+        for chunk in results:
+            for glyphName, result in chunk:
+                cache.set(glyphName, hasher.hash(glyphName), result)
+                measures[glyphName] = result
+        cache.prune(glyphSet.keys())
+        cache.save()
+
+    names = [name for name in glyphNames if measures[name]["bounds"] is not None]
+    return dict(
+        names = np.array(names),
+        bounds = np.array([measures[name]["bounds"] for name in names], dtype=float).reshape(-1, 4),
+        stemsX = np.array([x for name in names for x in measures[name]["stemsX"]], dtype=float),
+        stemsY = np.array([y for name in names for y in measures[name]["stemsY"]], dtype=float),
+        )
+
+def stemClusters(positions: np.ndarray, binSize: float = 2, count: int = 10) -> list:
+    """
+    Returns the `count` most populated clusters of stem `positions` as
+    `(position, share)`, found as the peaks of their smoothed histogram.
+    """
+    if not len(positions):
+        return []
+    start = np.floor(positions.min()) - binSize
+    bins = np.arange(start, positions.max() + 2 * binSize, binSize)
+    histogram, edges = np.histogram(positions, bins)
+    smoothed = np.convolve(histogram, [1, 2, 3, 2, 1], mode = "same") / 9
+    peaks = np.flatnonzero((smoothed[1:-1] >= smoothed[:-2]) & (smoothed[1:-1] > smoothed[2:])) + 1
+    peaks = peaks[np.argsort(smoothed[peaks])[::-1][:count]]
+    centers = (edges[:-1] + edges[1:]) * .5
+    return [(float(centers[i]), float(smoothed[i] / len(positions))) for i in peaks]
+
+def _foldedPeak(positions: np.ndarray, center: float, half: float) -> float:
+    """
+    Returns the distance from `center` at which stems cluster the most,
+    between 5% and 95% of `half`; stems at the same distance on both
+    sides of the center reinforce each other.
+    """
+    distances = np.abs(positions - center)
+    distances = distances[(distances > half * .05) & (distances < half * .95)]
+    clusters = stemClusters(distances, count = 1)
+    return clusters[0][0] if clusters else None
+
+def statistics(measures: dict) -> dict:
+    bounds = measures["bounds"]
+    stats = {"glyphs": int(len(bounds))}
+    if not len(bounds):
+        return stats
+    for i, name in enumerate(["xMin", "yMin", "xMax", "yMax"]):
+        stats[name] = dict(zip(map(str, PERCENTILES), np.percentile(bounds[:, i], PERCENTILES).round(1).tolist()))
+    stats["horizontalStems"] = stemClusters(measures["stemsY"])
+    stats["verticalStems"] = stemClusters(measures["stemsX"])
+    return stats
+
+def suggestSettings(measures: dict, designFrame, low: float = 10, high: float = 90) -> dict:
+    """
+    Returns settings for `designFrame` fitted to the measures: the
+    character face spans the `low` to `high` percentiles of the glyph
+    bounds, the overshoot covers how far the bounds spread around the
+    face edges, and the second lines sit on the strongest symmetric stem
+    clusters.
+    """
+    bounds = measures["bounds"]
+    settings = designFrame.get()
+    if not len(bounds):
+        return settings
+    w, h = designFrame.em_Dimension
+    left, bottom = np.percentile(bounds[:, 0], low), np.percentile(bounds[:, 1], low)
+    right, top = np.percentile(bounds[:, 2], high), np.percentile(bounds[:, 3], high)
+    characterFace = ((right - left) / w + (top - bottom) / h) * 50
+    settings["characterFace"] = int(round(min(max(characterFace, 1), 100)))
+    settings["shift"] = [int(round((left + right - w) * .5)), int(round((bottom + top - h) * .5))]
+
+    faceW, faceH = w * settings["characterFace"] / 100, h * settings["characterFace"] / 100
+    faceLeft = (w - faceW) * .5 + settings["shift"][0]
+    faceBottom = (h - faceH) * .5 + settings["shift"][1]
+    # signed distances of the glyph extremes to the face edges, outward positive
+    offsets = np.concatenate([
+        faceLeft - bounds[:, 0], 
+        bounds[:, 2] - faceLeft - faceW, 
+        faceBottom - bounds[:, 1], 
+        bounds[:, 3] - faceBottom - faceH,
+        ])
+    offsets = offsets[np.abs(offsets) < min(w, h) * .05]
+    outside, inside = offsets[offsets > 0], -offsets[offsets < 0]
+    settings["overshoot"] = [
+        int(round(np.percentile(outside, 90))) if len(outside) else 0,
+        int(round(np.percentile(inside, 90))) if len(inside) else 0,
+        ]
+
+    if settings.get("type", "han") == "han":
+        centerX, centerY = w * .5 + settings["shift"][0], h * .5 + settings["shift"][1]
+        horizontal = _foldedPeak(measures["stemsY"], centerY, h * .5)
+        vertical = _foldedPeak(measures["stemsX"], centerX, w * .5)
+        if horizontal is not None:
+            settings["horizontalLine"] = int(round(horizontal / (h * .5) * 50))
+        if vertical is not None:
+            settings["verticalLine"] = int(round(vertical / (w * .5) * 50))
+    return settings
+
+def main(args = None) -> int:
+    parser = argparse.ArgumentParser(description = "Suggest CJK design frame settings from the glyphs of a UFO.")
+    parser.add_argument("ufo", help = "path of the UFO")
+    parser.add_argument("--glyphs", nargs = "*", help = "glyph names to measure (default: all)")
+    parser.add_argument("--type", choices = ["han", "hangul"], help = "frame type (default: from the font lib)")
+    parser.add_argument("--low", type = float, default = 10, help = "low bounds percentile of the character face")
+    parser.add_argument("--high", type = float, default = 90, help = "high bounds percentile of the character face")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "number of worker processes")
+    parser.add_argument("--cache", help = "measures cache file (default: next to the UFO)")
+    parser.add_argument("--write", help = "write the suggested settings to this .CJKDesignFrameSettings file")
+    options = parser.parse_args(args)
+
+    settings = designFrameUFO.readSettings(designFrameUFO.openFont(options.ufo))
+    if options.type:
+        settings = dict(settings, type = options.type)
+    measures = loadMeasures(options.ufo, options.glyphs, options.workers, options.cache)
+    suggested = suggestSettings(measures, designFrameFromLib(settings), options.low, options.high)
+    json.dump(dict(statistics = statistics(measures), suggestedSettings = suggested), sys.stdout, indent = 2)
+    sys.stdout.write("\n")
+    if options.write:
+        with open(options.write, 'w', encoding = "utf-8") as file:
+            file.write(json.dumps(suggested))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1245 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from mojo.events                import addObserver, removeObserver
+from AppKit                     import NumberFormatter, NSColor, NSGraphicsContext
+from Quartz                     import CGContextGetClipBoundingBox
+from mojo.extensions            import getExtensionDefault, setExtensionDefault
+from mojo.UI                    import UpdateCurrentGlyphView, CurrentGlyphWindow, AllGlyphWindows
+from mojo.canvas                import CanvasGroup
+from mojo.drawingTools          import *
+from vanilla                    import *
+from vanilla.dialogs            import putFile, getFile, message
+from PyObjCTools.AppHelper      import callLater, callAfter
+from designFrameRedraw          import RedrawScheduler
+from designFrameLibWriter       import DebouncedLibWriter
+from designFrameWorker          import AnalysisWorker
+from designFrameTiming          import PhaseTimer
+from designFrame                import DesignFrame, DesignFrameError, HanDesignFrame, designFrameFromLib, SETTINGS_KEY
+from designFrameRaster          import TileCache, rasterize
+import designFrameCache
+import designFrameCoverage
+import designFrameExtrema
+import designFrameGeometry
+import designFrameProximity
+from collections                import OrderedDict
+from types                      import MappingProxyType
+import numpy as np
+import functools
+import json
+import math
+import weakref
+
+# toggleCJKDesignFrame = "com.black-foundry.toggleCJKDesignFrame"
+
+redrawScheduler = RedrawScheduler(UpdateCurrentGlyphView, callLater)
+
+TIMINGS_KEY = "com.black-foundry.CJKDesignFrame.timings"
+
+# opt-in: setExtensionDefault(TIMINGS_KEY, True), then restart RoboFont
+timings = PhaseTimer(enabled = getExtensionDefault(TIMINGS_KEY, False))
+
+def refreshGlyphView(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        func(self, *args, **kwargs)
+        redrawScheduler.request()
+    return wrapper
+
+class DesignFrameController:
+    """
+    Built by the `CJKDesignFrame` launcher on the first toggle of the
+    toolbar button.
+    """
+
+    def __init__(self):
+        self.observers = False
+        self.windowStates = {}
+        self.fontFrames = {}
+        # last invalid settings error shown for each font
+        self.libErrors = {}
+        self.currentFont = None
+        # the open settings window, which always edits the current font
+        self.settingsWindow = None
+        self.drawer = DesignFrameDrawer(self)
+        self.designFrame = HanDesignFrame()
+        self.toggleCJKDesignFrame = False
+        self.libWriter = DebouncedLibWriter(callLater)
+        self.analysisWorker = AnalysisWorker(callAfter)
+        addObserver(self, "glyphWindowDidOpen", "glyphWindowWillOpen")
+        addObserver(self, "glyphWindowWillClose", "glyphWindowWillClose")
+
+    def opaque(self):
+        return False
+
+    def acceptsFirstResponder(self):
+        return False
+
+    def acceptsMouseMoved(self):
+        return True
+
+    def becomeFirstResponder(self):
+        return False
+
+    def resignFirstResponder(self):
+        return False
+
+    def shouldDrawBackground(self):
+        return False
+
+    @property
+    def window(self):
+        return CurrentGlyphWindow()
+
+    def windowState(self, glyphWindow, create: bool = True):
+        """
+        Returns the overlay state of `glyphWindow`, keyed by its NSWindow.
+        """
+        if glyphWindow is None: return None
+        key = glyphWindow.getGlyphView().window()
+        if key not in self.windowStates and create:
+            self.windowStates[key] = GlyphWindowState(self, glyphWindow)
+        return self.windowStates.get(key)
+
+    def attachWindow(self, glyphWindow):
+        state = self.windowState(glyphWindow)
+        if state is not None:
+            state.attach()
+
+    def detachWindow(self, glyphWindow):
+        if glyphWindow is None: return
+        state = self.windowStates.pop(glyphWindow.getGlyphView().window(), None)
+        if state is not None:
+            state.detach()
+    
+    @refreshGlyphView
+    def buttonStartCallback(self, sender):
+        if self.toggleCJKDesignFrame == True:
+            for state in self.windowStates.values():
+                state.detach()
+            self.windowStates.clear()
+            self.toggleCJKDesignFrame = False
+            removeObserver(self, "glyphAdditionContextualMenuItems")
+            self.toggleObserver(True)
+            self.drawer.closeTiles()
+        else:
+            self.setFont()
+            for glyphWindow in AllGlyphWindows():
+                self.attachWindow(glyphWindow)
+            
+            removeObserver(self, "glyphAdditionContextualMenuItems")
+            if not self.currentFont.lib.get('CJKDesignFrameSettings', ''):
+                self.currentFont.lib["CJKDesignFrameSettings"] = self.designFrame.get()
+                self.openDesignFrameSettings(None)
+            addObserver(self, "glyphMenuItems", "glyphAdditionContextualMenuItems")
+            self.toggleCJKDesignFrame = True
+            self.toggleObserver()
+
+    @property
+    def designFrame(self):
+        return self._designFrame
+
+    @designFrame.setter
+    def designFrame(self, designFrame):
+        self._designFrame = designFrame
+        if self.currentFont is not None:
+            self.fontFrames[self.currentFont.naked()] = designFrame
+
+    def fontDesignFrame(self, font):
+        """
+        Returns the design frame of `font`, parsed from its lib once and
+        then kept until its lib changes or it is closed.
+        """
+        if font is None: return None
+        naked = font.naked()
+        if naked not in self.fontFrames:
+            self.fontFrames[naked] = self._readDesignFrame(naked)
+            naked.lib.addObserver(self, "fontLibChanged", "Lib.Changed")
+        return self.fontFrames[naked]
+
+    def _readDesignFrame(self, naked) -> DesignFrame:
+        try:
+            designFrame = designFrameFromLib(naked.lib.get(SETTINGS_KEY))
+        except DesignFrameError as error:
+            # shown once per font and error, not on every lib change
+            if self.libErrors.get(naked) != str(error):
+                self.libErrors[naked] = str(error)
+                callAfter(message, "Invalid design frame settings", 
+                    f"The {SETTINGS_KEY} settings of the font lib are invalid, the default frame is used instead.\n{error}")
+            return HanDesignFrame()
+        self.libErrors.pop(naked, None)
+        return designFrame
+
+    def forgetFont(self, naked):
+        self.libErrors.pop(naked, None)
+        if self.fontFrames.pop(naked, None) is None: return
+        naked.lib.removeObserver(self, "Lib.Changed")
+
+    @refreshGlyphView
+    def fontLibChanged(self, notification):
+        naked = notification.object.font
+        designFrame = self.fontFrames.get(naked)
+        if designFrame is None: return
+        if self.libWriter.pendingFor(naked): return
+        newDesignFrame = self._readDesignFrame(naked)
+        if newDesignFrame == designFrame: return
+        self.fontFrames[naked] = newDesignFrame
+        if self.currentFont is not None and self.currentFont.naked() is naked:
+            self._designFrame = self.fontFrames[naked]
+
+    def setFont(self):
+        self.libWriter.commit()
+        previousFont = self.currentFont
+        self.currentFont = CurrentFont()
+        if self.currentFont is not None:
+            self._designFrame = self.fontDesignFrame(self.currentFont)
+        if self.settingsWindow is not None and self.currentFont != previousFont:
+            # else its next edit would write the previous font's values
+            self.settingsWindow.setUI()
+
+    def toggleObserver(self, remove=False):
+        if self.observers or remove:
+            removeObserver(self, 'currentGlyphChanged')
+            removeObserver(self, 'drawPreview')
+            removeObserver(self, 'draw')
+            removeObserver(self, 'drawInactive')
+            removeObserver(self, 'fontBecameCurrent')
+            removeObserver(self, 'fontWillClose')
+            removeObserver(self, 'mouseMoved')
+            removeObserver(self, 'mouseDragged')
+            self.observers = False
+        else:
+            addObserver(self, 'currentGlyphChanged', 'currentGlyphChanged')
+            addObserver(self, 'glyphWindowDraw', 'draw')
+            addObserver(self, 'glyphWindowDraw', 'drawPreview')
+            addObserver(self, 'glyphWindowDraw', 'drawInactive')
+            addObserver(self, "updateFont", "fontBecameCurrent")
+            addObserver(self, "fontWillClose", "fontWillClose")
+            addObserver(self, "mouseMoved", "mouseMoved")
+            addObserver(self, "mouseMoved", "mouseDragged")
+            self.observers = True
+
+    def glyphMenuItems(self, info):
+        menuItems = []
+        item = ('Design Frame Settings', self.openDesignFrameSettings)
+        menuItems.append(item)
+        if timings.enabled:
+            menuItems.append(('Export Design Frame Timings', self.exportTimings))
+        info["additionContextualMenuItems"].extend(menuItems)
+
+    def openDesignFrameSettings(self, sender):
+        # addObserver(self, "glyphWindowDraw", "drawInactive")
+        if self.settingsWindow is not None:
+            self.settingsWindow.w.select()
+            return
+        self.settingsWindow = DesignFrameSettings(self)
+
+    def exportTimings(self, sender):
+        path = putFile(fileName = "CJKDesignFrameTimings.json")
+        if not path: return
+        timings.dump(path)
+
+    @timings.timed()
+    def glyphWindowDraw(self, info):
+        s = info['scale']
+        notificationName = info["notificationName"]
+        state = self.windowStates.get(info["view"].window())
+        if state is None or info["glyph"] is None: return
+        state.setGlyph(info["glyph"])
+        designFrame = self.fontDesignFrame(state.glyph.font)
+        if designFrame is None:
+            designFrame = self.designFrame
+        self.drawer.draw(state.glyph, notificationName, state, scale = s, visibleRect = currentVisibleRect(), designFrame = designFrame)
+
+    @timings.timed()
+    @refreshGlyphView
+    def currentGlyphChanged(self, info): 
+        state = self.windowState(self.window, create = False)
+        if state is None: return
+        state.setGlyph(CurrentGlyph())
+
+    @timings.timed()
+    def mouseMoved(self, info):
+        state = self.windowState(self.window, create = False)
+        if state is None or not state.hoverReadout or state.glyph is None: return
+        x, y = info["point"].x, info["point"].y
+        selection = state.glyph.selectedPoints
+        if len(selection) == 1:
+            x, y = selection[0].x, selection[0].y
+        designFrame = self.fontDesignFrame(state.glyph.font)
+        if state.hoverAt(x, y, self.drawer.geometry(designFrame = designFrame)["guides"]):
+            redrawScheduler.request()
+
+    @refreshGlyphView
+    def glyphWindowDidOpen(self, info):
+        if self.toggleCJKDesignFrame:
+            self.attachWindow(info["window"])
+
+    @refreshGlyphView
+    def glyphWindowWillClose(self, info):
+        self.detachWindow(info["window"])
+
+    @refreshGlyphView
+    def updateFont(self, info):   
+        self.setFont()
+
+    def fontWillClose(self, info):
+        font = info["font"]
+        if self.libWriter.pendingFor(font.naked()):
+            self.libWriter.commit()
+        self.forgetFont(font.naked())
+
+numberFormatter = NumberFormatter()
+transparentColor = NSColor.colorWithCalibratedRed_green_blue_alpha_(1, 1, 1, 0)
+
+def parsePositions(text: str) -> list:
+    return [float(v) for v in text.replace(";", ",").split(",") if v.strip()]
+
+def fieldNumber(value, name: str) -> int:
+    # formatted fields return None while they are empty
+    if value is None or value == "":
+        raise ValueError(f"{name} is empty")
+    return int(value)
+
+def formatPositions(positions: list) -> str:
+    return ", ".join("%g"%p for p in positions)
+
+def buttonAesthetic(element):
+    element.getNSButton().setFocusRingType_(1)
+    element.getNSButton().setBackgroundColor_(transparentColor)
+    element.getNSButton().setBordered_(False)
+
+class DesignFrameSettings:
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.w = HUDFloatingWindow((280, 435),
+            "Design Frame Settings",
+            )
+
+        y = 10
+        self.w.EM_DimensionTitle = TextBox(
+            (10, y, 150, 20),
+            "Em dimension x/y (FU)",
+            sizeStyle = "small"
+            )
+
+        self.w.EM_DimensionXEditText = EditText(
+            (140, y, 60, 20),
+            int(),
+            callback = self.callback,
+            formatter = numberFormatter,
+            sizeStyle = "small"
+            )
+        self.w.EM_DimensionXEditText.getNSTextField().setFocusRingType_(1)
+
+        self.w.EM_DimensionYEditText = EditText(
+            (210, y, 60, 20),
+            int(),
+            callback = self.callback,
+            formatter = numberFormatter,
+            sizeStyle = "small"
+            )
+        self.w.EM_DimensionYEditText.getNSTextField().setFocusRingType_(1)
+
+        y += 30
+        self.w.characterFaceTitle = TextBox(
+            (10, y, 150, 20),
+            "Character face (em %)",
+            sizeStyle = "small"
+            )
+
+        self.w.characterFaceEditText = EditText(
+            (140, y, 60, 20),
+            int(),
+            callback = self.callback,
+            formatter = numberFormatter,
+            sizeStyle = "small"
+            )
+        self.w.characterFaceEditText.getNSTextField().setFocusRingType_(1)
+
+        y += 30
+        self.w.overshootTitle = TextBox(
+            (10, y, 150, 20),
+            "Overshoot out/in (FU)",
+            sizeStyle = "small"
+            )
+
+        self.w.overshootOutEditText = EditText(
+            (140, y, 60, 20),
+            int(),
+            callback = self.callback,
+            formatter = numberFormatter,
+            sizeStyle = "small"
+            )
+        self.w.overshootOutEditText.getNSTextField().setFocusRingType_(1)
+
+        self.w.overshootInEditText = EditText(
+            (210, y, 60, 20),
+            int(),
+            callback = self.callback,
+            formatter = numberFormatter,
+            sizeStyle = "small"
+            )
+        self.w.overshootInEditText.getNSTextField().setFocusRingType_(1)
+
+        y += 30
+        self.w.shiftTitle = TextBox(
+            (10, y, 150, 20),
+            "Shift x/y (FU)",
+            sizeStyle = "small"
+            )
+
+        self.w.shiftXEditText = EditText(
+            (140, y, 60, 20),
+            int(),
+            callback = self.callback,
+            formatter = numberFormatter,
+            sizeStyle = "small"
+            )
+        self.w.shiftXEditText.getNSTextField().setFocusRingType_(1)
+
+        self.w.shiftYEditText = EditText(
+            (210, y, 60, 20),
+            int(),
+            callback = self.callback,
+            formatter = numberFormatter,
+            sizeStyle = "small"
+            )
+        self.w.shiftYEditText.getNSTextField().setFocusRingType_(1)
+
+        y += 30
+        self.w.segmentedButton = SegmentedButton(
+            (10, y, -10, 20),
+            [dict(title = "Han"), dict(title = "Hangul")],
+            callback = self.segmentedButtonCallback
+            )
+        self.w.segmentedButton.set(self.controller.designFrame.type == 'hangul')
+
+        y+=30
+        self.w.han = Group((0, y, -0, 120))
+        self.w.han.show(self.controller.designFrame.type == 'han')
+        self.w.hangul = Group((0, y, -0, 120))
+        self.w.hangul.show(self.controller.designFrame.type == 'hangul')
+
+        self.w.han.horizontaleLineTitle = TextBox(
+            (10, 0, 110, 20),
+            "Horizontale Line",
+            sizeStyle = "small"
+            )
+
+        self.w.han.horizontaleLineSlider = Slider(
+            (120, 0, -10, 20),
+            minValue = 0,
+            maxValue = 50,
+            value = 15,
+            callback = self.callback,
+            sizeStyle = "small"
+            )
+
+        self.w.han.verticaleLineTitle = TextBox(
+            (10, 30, 110, 20),
+            "Verticale Line",
+            sizeStyle = "small"
+            )
+
+        self.w.han.verticaleLineSlider = Slider(
+            (120, 30, -10, 20),
+            minValue = 0,
+            maxValue = 50,
+            value = 15,
+            callback = self.callback,
+            sizeStyle = "small"
+            )
+
+        self.w.hangul.horizontaleLineTitle = TextBox(
+            (10, 0, 110, 20),
+            "Horizontale Grid",
+            sizeStyle = "small"
+            )
+
+        self.w.hangul.horizontaleLineSlider = Slider(
+            (120, 0, -10, 20),
+            minValue = 1,
+            maxValue = 20,
+            value = 8,
+            tickMarkCount = 19,
+            stopOnTickMarks = True,
+            callback = self.callback,
+            sizeStyle = "small"
+            )
+
+        self.w.hangul.verticaleLineTitle = TextBox(
+            (10, 30, 110, 20),
+            "Verticale Grid",
+            sizeStyle = "small"
+            )
+
+        self.w.hangul.verticaleLineSlider = Slider(
+            (120, 30, -10, 20),
+            minValue = 1,
+            maxValue = 20,
+            value = 8,
+            tickMarkCount = 19,
+            stopOnTickMarks = True,
+            callback = self.callback,
+            sizeStyle = "small"
+            )
+
+        self.w.hangul.horizontalGridTitle = TextBox(
+            (10, 60, 110, 20),
+            "Rows (face %)",
+            sizeStyle = "small"
+            )
+
+        self.w.hangul.horizontalGridEditText = EditText(
+            (120, 60, -10, 20),
+            "",
+            placeholder = "e.g. 30, 55, 80",
+            callback = self.callback,
+            sizeStyle = "small"
+            )
+        self.w.hangul.horizontalGridEditText.getNSTextField().setFocusRingType_(1)
+
+        self.w.hangul.verticalGridTitle = TextBox(
+            (10, 90, 110, 20),
+            "Columns (face %)",
+            sizeStyle = "small"
+            )
+
+        self.w.hangul.verticalGridEditText = EditText(
+            (120, 90, -10, 20),
+            "",
+            placeholder = "e.g. 30, 55, 80",
+            callback = self.callback,
+            sizeStyle = "small"
+            )
+        self.w.hangul.verticalGridEditText.getNSTextField().setFocusRingType_(1)
+
+        y += 120
+        self.w.customsFrameTitle = TextBox(
+            (10, y, -10, 20),
+            "Customs Frames:",
+            sizeStyle = "small"
+            )
+        slider = SliderListCell(tickMarkCount=26, stopOnTickMarks=True)
+        self.w.customsFramesList = List(
+            (10, y+20, -10, 80),
+            [],
+            columnDescriptions = [{"title": "Name", "width" : 75}, 
+                                {"title": "Value", "cell": slider}],
+            showColumnTitles = False,
+            editCallback = self.callback,
+            drawFocusRing = False
+            )
+        self.w.addCustomFrame = Button(
+            (10, y+100, 130, 20),
+            "+",
+            callback = self.addCustomFrameCallback,
+            sizeStyle = 'small'
+            )
+        self.w.removeCustomFrame = Button(
+            (140, y+100, 130, 20),
+            "-",
+            callback = self.removeCustomFrameCallback,
+            sizeStyle = 'small'
+            )
+
+        self.w.exportButton = SquareButton(
+            (10, -30, 130, 20),
+            "Export",
+            callback = self.exportSettings,
+            )
+        buttonAesthetic(self.w.exportButton)
+
+        self.w.importButton = SquareButton(
+            (140, -30, 130, 20),
+            "Import",
+            callback = self.importSettings,
+            )
+        buttonAesthetic(self.w.importButton)
+
+        self.setUI()
+        self.w.bind("close", self.close)
+        self.w.open()
+
+    def exportSettings(self, sender: Button):
+        path = putFile()
+        path = path.split(".")[0]+".CJKDesignFrameSettings"
+        with open(path, 'w', encoding = "utf-8") as file:
+            file.write(json.dumps(self.controller.designFrame.get()))
+
+    @refreshGlyphView
+    def importSettings(self, sender: Button):
+        path = getFile()
+        if not path: return
+        try:
+            with open(path[0], 'r', encoding = "utf-8") as file:
+                designFrame = designFrameFromLib(json.load(file))
+        except (ValueError, OSError) as error:
+            message("Invalid design frame settings", str(error))
+            return
+        self.controller.designFrame = designFrame
+        self.setUI()
+
+    @refreshGlyphView
+    def segmentedButtonCallback(self, sender):
+        for i, group in enumerate([self.w.han, self.w.hangul]):
+            group.show(i == sender.get())
+        self.callback(sender)
+
+    @refreshGlyphView
+    def close(self, sender: Window):
+        # removeObserver(self.controller, 'drawInactive')
+        self.controller.libWriter.stage(self.controller.currentFont, self.controller.designFrame.get())
+        self.controller.libWriter.commit()
+        if self.controller.settingsWindow is self:
+            self.controller.settingsWindow = None
+
+    @refreshGlyphView
+    def addCustomFrameCallback(self, sender: Button):
+        name = "Frame%i"%len(self.w.customsFramesList.get())
+        self.w.customsFramesList.append(dict(Name = name, Value = 0))
+
+    def removeCustomFrameCallback(self, sender: Button):
+        sel = self.w.customsFramesList.getSelection()
+        if not sel: return
+        l = self.w.customsFramesList.get()
+        l.pop(sel[0])
+        self.w.customsFramesList.set(l)
+        self.callback(None)
+
+    @timings.timed()
+    @refreshGlyphView
+    def callback(self, sender):
+        try:
+            x = fieldNumber(self.w.EM_DimensionXEditText.get(), "em width")
+            y = fieldNumber(self.w.EM_DimensionYEditText.get(), "em height")
+            charface = fieldNumber(self.w.characterFaceEditText.get(), "character face")
+            overshootIn = fieldNumber(self.w.overshootInEditText.get(), "inside overshoot")
+            overshootOut = fieldNumber(self.w.overshootOutEditText.get(), "outside overshoot")
+
+            shiftX = fieldNumber(self.w.shiftXEditText.get(), "horizontal shift")
+            shiftY = fieldNumber(self.w.shiftYEditText.get(), "vertical shift")
+
+            dftype = ["han", "hangul"][int(self.w.segmentedButton.get())]
+            if dftype == 'han':
+                horizontaleLine = int(self.w.han.horizontaleLineSlider.get())
+                verticalLine = int(self.w.han.verticaleLineSlider.get())
+            else:
+                horizontaleLine = int(self.w.hangul.horizontaleLineSlider.get())
+                verticalLine = int(self.w.hangul.verticaleLineSlider.get())
+            if dftype == 'hangul':
+                horizontalGrid = parsePositions(self.w.hangul.horizontalGridEditText.get())
+                verticalGrid = parsePositions(self.w.hangul.verticalGridEditText.get())
+            customsFrames = self.w.customsFramesList.get()
+            customsFrames = [{"Name":e["Name"], "Value":fieldNumber(e["Value"], f"{e['Name']} value")} for e in customsFrames]
+            lib = {
+                "em_Dimension":[x, y],
+                "characterFace":charface,
+                "overshoot":[overshootOut, overshootIn],
+                "shift":[shiftX, shiftY],
+                "horizontalLine":horizontaleLine,
+                "verticalLine":verticalLine,
+                "customsFrames":customsFrames,
+                "type": dftype
+                }
+            if dftype == 'hangul':
+                lib["horizontalGrid"] = horizontalGrid
+                lib["verticalGrid"] = verticalGrid
+            designFrame = designFrameFromLib(lib)
+        except (TypeError, ValueError) as error:
+            # the fields are edited live, keep the last valid settings meanwhile
+            self.w.setTitle(f"Design Frame Settings ({error})")
+            return
+        self.w.setTitle("Design Frame Settings")
+        if designFrame == self.controller.designFrame: return
+        self.controller.designFrame = designFrame
+        self.controller.libWriter.stage(self.controller.currentFont, designFrame.get())
+
+    def setUI(self):
+        lib = self.controller.designFrame.get()
+        self.w.EM_DimensionXEditText.set(int(lib.get("em_Dimension", list())[0]))
+        self.w.EM_DimensionYEditText.set(int(lib.get("em_Dimension", list())[1]))
+        self.w.characterFaceEditText.set(int(lib.get("characterFace", int())))
+        self.w.overshootInEditText.set(int(lib.get("overshoot", list())[1]))
+        self.w.overshootOutEditText.set(int(lib.get("overshoot", list())[0]))
+        self.w.shiftXEditText.set(int(lib.get("shift", list())[0]))
+        self.w.shiftYEditText.set(int(lib.get("shift", list())[1]))
+        if self.controller.designFrame.type == 'han':
+            self.w.han.horizontaleLineSlider.set(int(lib.get("horizontalLine", int())))
+            self.w.han.verticaleLineSlider.set(int(lib.get("verticalLine", int())))
+        else:
+            self.w.hangul.horizontaleLineSlider.set(int(lib.get("horizontalLine", int())))
+            self.w.hangul.verticaleLineSlider.set(int(lib.get("verticalLine", int())))
+            self.w.hangul.horizontalGridEditText.set(formatPositions(lib.get("horizontalGrid", list())))
+            self.w.hangul.verticalGridEditText.set(formatPositions(lib.get("verticalGrid", list())))
+        self.w.customsFramesList.set(lib.get("customsFrames", list()))
+        self.w.segmentedButton.set(lib.get("type", "han") != "han")
+        self.segmentedButtonCallback(self.w.segmentedButton)
+
+class ViewCanvas(CanvasGroup):
+
+    def __init__(self, state, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.state = state
+
+        y = 5
+        self.drawPreview = CheckBox((5, y, -0, 20), 
+            "Draw Preview", 
+            value = 0, 
+            callback = self.drawPreviewCallback,
+            sizeStyle = "mini"
+            )
+        y += 20
+        self.secondLines = CheckBox((5, y, -0, 20), 
+            "Second Lines", 
+            value = 1, 
+            callback = self.secondLinesCallback,
+            sizeStyle = "mini"
+            )
+        y += 20
+        self.customsFrames = CheckBox((5, y, -0, 20), 
+            "Customs Frames", 
+            value = 1, 
+            callback = self.customsFrameCallback,
+            sizeStyle = "mini"
+            )
+        y += 20
+        self.proximityPoints = CheckBox((5, y, -0, 20), 
+            "Proximity Points", 
+            value = 0, 
+            callback = self.proximityPointsCallback,
+            sizeStyle = "mini"
+            )
+        y += 20
+        self.hoverReadout = CheckBox((5, y, -0, 20), 
+            "Hover Readout", 
+            value = 0, 
+            callback = self.hoverReadoutCallback,
+            sizeStyle = "mini"
+            )
+        y += 20
+        self.curveExtrema = CheckBox((5, y, -0, 20), 
+            "Curve Extrema", 
+            value = 0, 
+            callback = self.curveExtremaCallback,
+            sizeStyle = "mini"
+            )
+        y += 20
+        self.inkCoverage = CheckBox((5, y, -0, 20), 
+            "Ink Coverage", 
+            value = 0, 
+            callback = self.inkCoverageCallback,
+            sizeStyle = "mini"
+            )
+
+    @refreshGlyphView    
+    def drawPreviewCallback(self, sender: CheckBox):
+        self.state.drawPreview = sender.get()
+
+    @refreshGlyphView    
+    def secondLinesCallback(self, sender: CheckBox):
+        self.state.secondLines = sender.get()
+
+    @refreshGlyphView    
+    def customsFrameCallback(self, sender: CheckBox):
+        self.state.customsFrames = sender.get()
+
+    @refreshGlyphView    
+    def proximityPointsCallback(self, sender: CheckBox):
+        self.state.proximityPoints = sender.get()
+
+    @refreshGlyphView    
+    def hoverReadoutCallback(self, sender: CheckBox):
+        self.state.hoverReadout = sender.get()
+        self.state.hover = None
+
+    @refreshGlyphView    
+    def curveExtremaCallback(self, sender: CheckBox):
+        self.state.curveExtrema = sender.get()
+
+    @refreshGlyphView    
+    def inkCoverageCallback(self, sender: CheckBox):
+        self.state.inkCoverage = sender.get()
+
+class GlyphWindowState:
+    """
+    The overlay state of one glyph window: its toggles, its canvas, the
+    glyph it shows and the analysis of that glyph. The frame geometry
+    itself is shared by every window through the drawer. The glyph is
+    analysed on the controller's `AnalysisWorker`, drawing only uses the
+    last finished results.
+    """
+
+    def __init__(self, controller, glyphWindow = None):
+        self.controller = controller
+        self.glyphWindow = glyphWindow
+        self.drawPreview = False
+        self.secondLines = True
+        self.customsFrames = True
+        self.proximityPoints = False
+        self.hoverReadout = False
+        self.curveExtrema = False
+        self.inkCoverage = False
+        self.hover = None
+        self.glyph = None
+        self.analysis = {}
+        self.latest = {}
+        self.generation = 0
+        self.requested = {}
+        self.view = None
+
+    def attach(self):
+        if self.glyphWindow is None: return
+        if self.view is None:
+            self.view = ViewCanvas(
+                self, 
+                posSize = (20, 20, 100, 145),
+                delegate = self.controller
+                )
+        self.glyphWindow.addGlyphEditorSubview(self.view)
+        self.view.show(True)
+
+    def detach(self):
+        self.setGlyph(None)
+        if self.view is None: return
+        try:self.glyphWindow.removeGlyphEditorSubview(self.view)
+        except:pass
+
+    def isCurrentGlyph(self, glyph) -> bool:
+        """
+        Returns whether `glyph` is the glyph of the window, whatever
+        fontParts wrapper it comes in.
+        """
+        if glyph is None or self.glyph is None:
+            return glyph is self.glyph
+        return glyph.naked() is self.glyph.naked()
+
+    def setGlyph(self, glyph):
+        if self.isCurrentGlyph(glyph): return
+        if self.glyph is not None:
+            self.glyph.removeObserver(self, "Glyph.Changed")
+        self.glyph = glyph
+        self.generation += 1
+        self.cancelAnalysis()
+        self.latest.clear()
+        if glyph is not None:
+            glyph.addObserver(self, "glyphChanged", "Glyph.Changed")
+
+    def glyphChanged(self, notification):
+        # the latest results stay drawn until the new ones are finished
+        self.generation += 1
+        self.cancelAnalysis()
+
+    def cancelAnalysis(self):
+        for kind in self.requested:
+            self.controller.analysisWorker.cancel((self, kind))
+        self.requested.clear()
+        self.analysis.clear()
+
+    def analyze(self, kind: str, key, function, snapshot):
+        """
+        Returns the result of `function(*snapshot())` for `key`, computed
+        on the analysis worker. Until it is finished, returns the latest
+        result of `kind` for the glyph, or None.
+        """
+        # results of another glyph or outline are never taken for this one
+        key = (key, self.generation)
+        if key in self.analysis: return self.analysis[key]
+        if self.requested.get(kind) != key:
+            self.requested[kind] = key
+            self.controller.analysisWorker.submit((self, kind), function, snapshot(), 
+                lambda result: self._analysisFinished(kind, key, result))
+        return self.latest.get(kind)
+
+    def _analysisFinished(self, kind: str, key, result):
+        if self.requested.get(kind) != key: return
+        del self.requested[kind]
+        self.analysis[key] = self.latest[kind] = result
+        redrawScheduler.request()
+
+    def proximityAnalysis(self, glyph, geometry: dict) -> tuple:
+        """
+        Returns the on-curve points of `glyph` and their proximity flags,
+        or None while they are being computed.
+        """
+        edges = geometry["proximityEdges"]
+        snapshot = lambda: (designFrameProximity.contoursSnapshot(glyph), edges)
+        if not self.isCurrentGlyph(glyph):
+            return designFrameProximity.classifyContours(*snapshot())
+        return self.analyze("proximity", ("proximity", geometry["settingsKey"]), designFrameProximity.classifyContours, snapshot)
+
+    def extremaAnalysis(self, glyph, geometry: dict) -> list:
+        """
+        Returns the outline extrema of `glyph` outside the overshoot band,
+        as `outsideOvershoot` issues, or None while they are being computed.
+        """
+        edges = geometry["proximityEdges"]
+        snapshot = lambda: (designFrameProximity.contoursSnapshot(glyph), edges)
+        if not self.isCurrentGlyph(glyph):
+            return designFrameExtrema.checkContours(*snapshot())
+        return self.analyze("extrema", ("extrema", geometry["settingsKey"]), designFrameExtrema.checkContours, snapshot)
+
+    def coverageAnalysis(self, glyph, geometry: dict):
+        """
+        Returns the ink coverage of `glyph` per grid cell, first row on top,
+        or None while it is being computed.
+        """
+        cells = geometry["coverageCells"]
+        snapshot = lambda: (designFrameCoverage.glyphSnapshot(glyph), cells)
+        if not self.isCurrentGlyph(glyph):
+            return designFrameCoverage.glyphCoverage(*snapshot())
+        return self.analyze("coverage", ("coverage", geometry["settingsKey"]), designFrameCoverage.glyphCoverage, snapshot)
+
+    def hoverAt(self, x: float, y: float, guides) -> bool:
+        """
+        Looks up the frame line nearest to `(x, y)` in the `guides` index,
+        returns whether the readout changed.
+        """
+        hover = (x, y, guides.nearest(x, y))
+        if hover == self.hover: return False
+        self.hover = hover
+        return True
+
+RASTERIZE_OVERLAY_KEY = "com.black-foundry.CJKDesignFrame.rasterizeOverlay"
+
+LOD_PIXEL_THRESHOLD = 4
+LOD_MIN_BUCKET = designFrameGeometry.zoomBucket(LOD_PIXEL_THRESHOLD ** -1)
+LOD_CACHE_SIZE = 16
+
+def visibleTile(rect: tuple) -> tuple:
+    """
+    Snaps `rect` (x, y, width, height) outward to a grid of its own size
+    rounded up to a power of two, so small scrolls hit the same tile.
+    """
+    x, y, w, h = rect
+    size = 2 ** math.ceil(math.log2(max(w, h, 1)))
+    return (
+        math.floor(x / size) * size, 
+        math.floor(y / size) * size, 
+        math.ceil((x + w) / size) * size, 
+        math.ceil((y + h) / size) * size
+        )
+
+def currentVisibleRect() -> tuple:
+    """
+    Returns the part of the glyph view being drawn, in glyph coordinates.
+    """
+    context = NSGraphicsContext.currentContext()
+    if context is None: return None
+    (x, y), (w, h) = CGContextGetClipBoundingBox(context.CGContext())
+    return x, y, w, h
+
+def buildOverlayTile(geometry: dict, bucket: int, styles: tuple):
+    """
+    Rasterizes the `styles` of `geometry` for the zoom `bucket` and
+    encodes the tile as PNG, or returns None if it would be too large.
+    Runs on the analysis worker.
+    """
+    pixelSize = designFrameGeometry.bucketScale(bucket)
+    frameGeometry = designFrameGeometry.levelOfDetail(geometry["frameGeometry"], pixelSize)
+    displayList = designFrameGeometry.displayList(frameGeometry, *geometry["translate_secondLine"])
+    displayList = [(style, contours) for style, contours in displayList if style in styles]
+    xMin, yMin, xMax, yMax = geometry["bounds"]
+    bounds = (xMin - pixelSize, yMin - pixelSize, xMax + pixelSize, yMax + pixelSize)
+    try:
+        tile = rasterize(displayList, bounds, pixelSize)
+    except ValueError:
+        return None
+    tile.encode()
+    return tile
+
+class DesignFrameDrawer:
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.defaultState = GlyphWindowState(controller)
+        self.rasterizeOverlay = getExtensionDefault(RASTERIZE_OVERLAY_KEY, False)
+        self.tileCache = TileCache()
+        self._requestedTile = None
+        self.invalidate()
+
+    def invalidate(self):
+        # geometry per design frame value, shared by the fonts with the same settings
+        self._geometries = weakref.WeakKeyDictionary()
+
+    def _makeGlyph(self, contours) -> RGlyph:
+        glyph = RGlyph()
+        pen = glyph.getPen()
+        for contour in contours:
+            pen.moveTo(contour[0])
+            for point in contour[1:]:
+                pen.lineTo(point)
+            pen.closePath()
+        return glyph
+
+    def _buildGeometry(self, 
+            designFrame, 
+            translate_secondLine_X: int = 0, 
+            translate_secondLine_Y: int = 0) -> dict:
+        frameGeometry = designFrameGeometry.frameGeometry(designFrame)
+        displayList = designFrameGeometry.displayList(frameGeometry, translate_secondLine_X, translate_secondLine_Y)
+        # shared by every glyph window, only "levelsOfDetail" is filled lazily
+        return MappingProxyType({
+            "frameGeometry": frameGeometry,
+            "settingsKey": designFrameCache.settingsKey(designFrame),
+            "translate_secondLine": (translate_secondLine_X, translate_secondLine_Y),
+            "bounds": designFrameGeometry.contourBounds([p for style, contours in displayList for contour in contours for p in contour]),
+            "proximityEdges": designFrameProximity.proximityEdges(designFrame),
+            "guides": designFrameProximity.frameGuides(designFrame),
+            "coverageCells": designFrameCoverage.gridCells(designFrame),
+            "displayList": self._makeDisplayList(displayList),
+            "levelsOfDetail": OrderedDict(),
+            })
+
+    def _makeDisplayList(self, displayList) -> tuple:
+        return tuple((style, self._makeGlyph(contours)) for style, contours in displayList if contours)
+
+    def displayList(self, geometry: dict, scale: float = 1, visibleRect: tuple = None) -> list:
+        """
+        Returns the display list for the glyph view `scale` and the
+        `visibleRect` (x, y, width, height) in frame coordinates, cached
+        per zoom bucket and visible tile.
+        """
+        bucket = designFrameGeometry.zoomBucket(scale)
+        tile = None
+        if visibleRect is not None:
+            tile = visibleTile(visibleRect)
+            frameBounds = geometry["bounds"]
+            if tile[0] <= frameBounds[0] and tile[1] <= frameBounds[1] \
+                    and tile[2] >= frameBounds[2] and tile[3] >= frameBounds[3]:
+                tile = None
+        if bucket <= LOD_MIN_BUCKET and tile is None:
+            return geometry["displayList"]
+        levelsOfDetail = geometry["levelsOfDetail"]
+        key = (max(bucket, LOD_MIN_BUCKET), tile)
+        if key not in levelsOfDetail:
+            frameGeometry = geometry["frameGeometry"]
+            if bucket > LOD_MIN_BUCKET:
+                frameGeometry = designFrameGeometry.levelOfDetail(frameGeometry, designFrameGeometry.bucketScale(bucket))
+            displayList = designFrameGeometry.displayList(frameGeometry, *geometry["translate_secondLine"])
+            if tile is not None:
+                displayList = designFrameGeometry.cullDisplayList(displayList, tile)
+            levelsOfDetail[key] = self._makeDisplayList(displayList)
+            if len(levelsOfDetail) > LOD_CACHE_SIZE:
+                levelsOfDetail.popitem(last = False)
+        levelsOfDetail.move_to_end(key)
+        return levelsOfDetail[key]
+
+    def geometry(self, 
+            translate_secondLine_X: int = 0, 
+            translate_secondLine_Y: int = 0,
+            designFrame: DesignFrame = None) -> dict:
+        if designFrame is None:
+            designFrame = self.controller.designFrame
+        key = (translate_secondLine_X, translate_secondLine_Y)
+        cached = self._geometries.get(designFrame)
+        if cached is None or cached[0] != key:
+            cached = key, self._buildGeometry(designFrame, translate_secondLine_X, translate_secondLine_Y)
+            self._geometries[designFrame] = cached
+        return cached[1]
+
+    def overlayTile(self, geometry: dict, scale: float, styles: tuple):
+        """
+        Returns the rasterized overlay of the enabled `styles` for the
+        zoom bucket of `scale`. Returns None while the tile is built on
+        the analysis worker, or if it would be too large.
+        """
+        bucket = designFrameGeometry.zoomBucket(scale)
+        key = (geometry["settingsKey"], geometry["translate_secondLine"], bucket, styles)
+        if key in self.tileCache:
+            return self.tileCache.get(key)
+        if self._requestedTile != key:
+            self._requestedTile = key
+            self.controller.analysisWorker.submit((self, "tile"), buildOverlayTile, (geometry, bucket, styles), 
+                lambda tile: self._tileFinished(key, tile))
+        return None
+
+    def _tileFinished(self, key, tile):
+        if self._requestedTile != key: return
+        self._requestedTile = None
+        self.tileCache.add(key, tile)
+        redrawScheduler.request()
+
+    def closeTiles(self):
+        """
+        Cancels the tile being built and discards the cached ones.
+        """
+        self.controller.analysisWorker.cancel((self, "tile"))
+        self._requestedTile = None
+        self.tileCache.close()
+
+    def _drawTile(self, tile):
+        save()
+        translate(*tile.origin)
+        scale(tile.pixelSize)
+        image(tile.path, (0, 0))
+        restore()
+
+    def _drawProximityPoints(self, points, flags, translateX: int, translateY: int, scale: float, visibleRect: tuple = None):
+        points = points - (translateX, translateY)
+        if visibleRect is not None:
+            x, y, w, h = visibleRect
+            visible = (points[:, 0] >= x) & (points[:, 0] <= x + w) & (points[:, 1] >= y) & (points[:, 1] <= y + h)
+            points, flags = points[visible], flags[visible]
+        # markers closer than a few pixels are merged into one
+        grid = LOD_PIXEL_THRESHOLD * scale
+        for flag, color, radius in [
+                (designFrameProximity.ON_FRAME, (0, 0, 1, .4), 10),
+                (designFrameProximity.NEAR_OVERSHOOT, (1, 0, 0, .4), 20),
+                (designFrameProximity.NEAR_SECOND_LINE, (.65, 0.16, .39, .4), 20),
+                ]:
+            selected = points[(flags & flag) != 0]
+            if not len(selected): continue
+            if grid > 1:
+                selected = np.unique(np.round(selected / grid), axis=0) * grid
+            fill(*color)
+            r = radius * scale
+            for px, py in selected:
+                oval(px - r, py - r, 2 * r, 2 * r)
+
+    def _drawProximityAnalysis(self, state: GlyphWindowState, glyph, geometry: dict, translateX: int, translateY: int, scale: float, visibleRect: tuple = None):
+        analysis = state.proximityAnalysis(glyph, geometry)
+        if analysis is None: return
+        self._drawProximityPoints(*analysis, translateX, translateY, scale, visibleRect)
+
+    def _drawCurveExtrema(self, state: GlyphWindowState, glyph, geometry: dict, translateX: int, translateY: int, scale: float):
+        issues = state.extremaAnalysis(glyph, geometry)
+        if not issues: return
+        r = 6 * scale
+        fill(None)
+        stroke(1, .4, 0, .9)
+        strokeWidth(2 * scale)
+        for issue in issues:
+            horizontal = issue["side"] in ("left", "right")
+            for px, py in issue["points"]:
+                px, py = px - translateX, py - translateY
+                oval(px - r, py - r, 2 * r, 2 * r)
+                # from the extremum to the outer overshoot edge it crosses
+                if horizontal:
+                    line((px, py), (issue["limit"] - translateX, py))
+                else:
+                    line((px, py), (px, issue["limit"] - translateY))
+
+    def _drawInkCoverage(self, state: GlyphWindowState, glyph, geometry: dict, translateX: int, translateY: int, scale: float):
+        coverage = state.coverageAnalysis(glyph, geometry)
+        if coverage is None: return
+        xEdges, yEdges = geometry["coverageCells"]
+        xEdges, yEdges = xEdges - translateX, yEdges[::-1] - translateY
+        # values are only written in cells wide enough on screen
+        labels = (xEdges[1] - xEdges[0]) / scale > 40
+        if labels:
+            fontSize(9 * scale)
+        stroke(None)
+        for row, (top, bottom) in enumerate(zip(yEdges, yEdges[1:])):
+            for column, (left, right) in enumerate(zip(xEdges, xEdges[1:])):
+                value = coverage[row, column]
+                fill(1, .35, 0, .5 * value)
+                rect(left, bottom, right - left, top - bottom)
+                if labels:
+                    fill(0, 0, 0, .8)
+                    text("%d%%" % round(value * 100), (left + 3 * scale, top - 12 * scale))
+
+    def _drawHoverReadout(self, x: float, y: float, nearest: dict, scale: float):
+        if nearest is None: return
+        if nearest["axis"] == "x":
+            target = (nearest["position"], y)
+        else:
+            target = (x, nearest["position"])
+        save()
+        stroke(0, 0, 0, .6)
+        strokeWidth(scale)
+        line((x, y), target)
+        stroke(None)
+        fill(0, 0, 0, .8)
+        fontSize(10 * scale)
+        text("%g %s" % (round(nearest["distance"], 1), nearest["label"]), (x + 6 * scale, y + 6 * scale))
+        restore()
+
+    def draw(self, 
+            glyph = None,
+            notificationName: str = "",
+            state: GlyphWindowState = None,
+            mainFrames: bool = True, 
+            customsFrames: bool = True,
+            proximityPoints: bool = False, 
+            translate_secondLine_X: int = 0, 
+            translate_secondLine_Y: int = 0,
+            scale: float = 1,
+            visibleRect: tuple = None,
+            designFrame: DesignFrame = None):
+
+        state = state or self.defaultState
+        if notificationName == 'drawPreview' and not state.drawPreview: return
+        if designFrame is None:
+            designFrame = self.controller.designFrame
+        if not designFrame: return
+        with timings.phase("geometry"):
+            geometry = self.geometry(translate_secondLine_X, translate_secondLine_Y, designFrame)
+        enabled = {
+            designFrameGeometry.FRAMES: mainFrames,
+            designFrameGeometry.OVERSHOOT: mainFrames,
+            designFrameGeometry.SECOND_LINES: state.secondLines,
+            designFrameGeometry.CUSTOMS_FRAMES: state.customsFrames,
+            }
+        drawProximityPoints = (proximityPoints or state.proximityPoints) and glyph is not None
+        save()
+        translateX, translateY = designFrame.shift
+        translate(translateX,translateY)
+        if visibleRect is not None:
+            x, y, width, height = visibleRect
+            visibleRect = (x - translateX, y - translateY, width, height)
+
+        tile = None
+        if self.rasterizeOverlay:
+            styles = tuple(style for style, path in geometry["displayList"] if enabled[style])
+            with timings.phase("tile"):
+                tile = self.overlayTile(geometry, scale, styles)
+                if tile is not None:
+                    self._drawTile(tile)
+        if tile is not None:
+            if drawProximityPoints:
+                with timings.phase("proximity"):
+                    self._drawProximityAnalysis(state, glyph, geometry, translateX, translateY, scale, visibleRect)
+        else:
+            with timings.phase("displayList"):
+                displayList = self.displayList(geometry, scale, visibleRect)
+            for style, path in displayList:
+                if not enabled[style]: continue
+                with timings.phase(style):
+                    fillColor, strokeColor = designFrameGeometry.STYLES[style]
+                    fill(*(fillColor or (None,)))
+                    stroke(*(strokeColor or (None,)))
+                    drawGlyph(path)
+
+                if style == designFrameGeometry.OVERSHOOT and drawProximityPoints:
+                    with timings.phase("proximity"):
+                        self._drawProximityAnalysis(state, glyph, geometry, translateX, translateY, scale, visibleRect)
+        if state.inkCoverage and glyph is not None:
+            with timings.phase("inkCoverage"):
+                self._drawInkCoverage(state, glyph, geometry, translateX, translateY, scale)
+        if state.curveExtrema and glyph is not None:
+            with timings.phase("curveExtrema"):
+                self._drawCurveExtrema(state, glyph, geometry, translateX, translateY, scale)
+        restore()
+
+        if state.hoverReadout and state.hover is not None:
+            with timings.phase("hoverReadout"):
+                self._drawHoverReadout(*state.hover, scale)
@@ -0,0 +1,140 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Ink coverage of a glyph per cell of the hangul grid.
+
+The outline is flattened into straight edges and filled with the nonzero
+winding rule along horizontal scanlines, all scanlines at once. The ink
+spans of each scanline are clipped exactly to the cell columns, and with
+the default scanlines one unit apart, straight outlines on integer
+coordinates are measured exactly.
+"""
+
+import numpy as np
+from fontTools.pens.transformPen import TransformPointPen
+
+import designFrameExtrema
+import designFrameGeometry
+import designFramePens
+
+def _drawDecomposed(glyph, pointPen, depth: int = 0):
+    for contour in glyph:
+        contour.drawPoints(pointPen)
+    layer = glyph.layer
+    for component in glyph.components:
+        # deeply nested components are most likely a cycle
+        if layer is None or depth > 16 or component.baseGlyph not in layer: continue
+        _drawDecomposed(layer[component.baseGlyph], TransformPointPen(pointPen, component.transformation), depth + 1)
+
+def glyphSnapshot(glyph) -> tuple:
+    """
+    Returns the contours of `glyph`, components decomposed, as tuples of
+    `(x, y, segmentType)` safe to hand over to another thread.
+    """
+    pen = designFramePens.ContourRecordingPointPen()
+    _drawDecomposed(glyph, pen)
+    return tuple(tuple(contour) for contour in pen.contours)
+
+def gridCells(designFrame) -> tuple:
+    """
+    Returns the `(xEdges, yEdges)` arrays bounding the grid cells of the
+    character face, shifted in glyph coordinates. A han frame has a
+    single cell, the character face.
+    """
+    w, h = designFrame.em_Dimension
+    x, y, width, height = designFrameGeometry.getEmRatioFrame(designFrame.characterFace, w, h)
+    columns = rows = ()
+    if designFrame.type == "hangul":
+        columns = designFrameGeometry.gridPositions(x, width, int(designFrame.verticalLine), tuple(designFrame.verticalGrid))
+        rows = designFrameGeometry.gridPositions(y, height, int(designFrame.horizontalLine), tuple(designFrame.horizontalGrid))
+    otRound = designFrameGeometry.otRound
+    shiftX, shiftY = designFrame.shift
+    xEdges = np.array([otRound(x), *columns, otRound(x + width)], dtype=float) + shiftX
+    yEdges = np.array([otRound(y), *rows, otRound(y + height)], dtype=float) + shiftY
+    return xEdges, yEdges
+
+def outlineEdges(contours, steps: int = 8) -> np.ndarray:
+    """
+    Returns the closed `contours` flattened into `(n, 2, 2)` straight
+    edges, every curve segment split into `steps` edges. Open contours
+    are not filled, they are left out.
+    """
+    closed = [contour for contour in contours if contour and contour[0][2] != "move"]
+    lines, quadratics, cubics = designFrameExtrema.segments(closed)
+    t = np.linspace(0, 1, steps + 1)[None, :, None]
+    mt = 1 - t
+    p = quadratics[:, None]
+    quadraticPoints = mt * mt * p[:, :, 0] + 2 * mt * t * p[:, :, 1] + t * t * p[:, :, 2]
+    p = cubics[:, None]
+    cubicPoints = mt ** 3 * p[:, :, 0] + 3 * mt * mt * t * p[:, :, 1] + 3 * mt * t * t * p[:, :, 2] + t ** 3 * p[:, :, 3]
+    polylines = np.concatenate([quadraticPoints, cubicPoints])
+    return np.concatenate([
+        lines,
+        np.stack([polylines[:, :-1], polylines[:, 1:]], axis = 2).reshape(-1, 2, 2),
+        ])
+
+def _offsets(counts: np.ndarray) -> np.ndarray:
+    # 0 to count - 1 for each of the `counts`, concatenated
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+def cellCoverage(edges: np.ndarray, xEdges: np.ndarray, yEdges: np.ndarray, step: float = 1) -> np.ndarray:
+    """
+    Returns the share of each grid cell covered by the outline `edges`,
+    as a `(rows, columns)` array whose first row is the top row. Each
+    row of cells is sampled by scanlines about `step` units apart.
+    """
+    heights, widths = np.diff(yEdges), np.diff(xEdges)
+    area = np.zeros((len(heights), len(widths)))
+    if not len(edges) or not area.size:
+        return area
+    counts = np.maximum(np.ceil(heights / step).astype(int), 1)
+    cellRows = np.repeat(np.arange(len(heights)), counts)
+    spacing = np.repeat(heights / counts, counts)
+    # scanlines are spread evenly in each row of cells
+    ys = np.repeat(yEdges[:-1], counts) + (_offsets(counts) + .5) * spacing
+
+    x0, y0, x1, y1 = edges[:, 0, 0], edges[:, 0, 1], edges[:, 1, 0], edges[:, 1, 1]
+    # an edge crosses the scanlines from its lower end included to its
+    # upper end excluded
+    first = np.searchsorted(ys, np.minimum(y0, y1))
+    crossed = np.searchsorted(ys, np.maximum(y0, y1)) - first
+    if not crossed.sum():
+        return area
+    edge = np.repeat(np.arange(len(crossed)), crossed)
+    scanline = first[edge] + _offsets(crossed)
+    crossings = x0[edge] + (ys[scanline] - y0[edge]) * (x1[edge] - x0[edge]) / (y1[edge] - y0[edge])
+    winding = np.where(y1[edge] > y0[edge], 1, -1)
+    order = np.lexsort((crossings, scanline))
+    scanline, crossings, winding = scanline[order], crossings[order], winding[order]
+    # closed contours cross each scanline as many times up as down, so
+    # the running winding number is back to zero at the end of each one
+    inside = np.cumsum(winding) != 0
+    start = np.flatnonzero(inside[:-1] & (scanline[:-1] == scanline[1:]))
+    spanScanlines = scanline[start]
+    left, right = crossings[start, None], crossings[start + 1, None]
+    lengths = np.clip(np.minimum(right, xEdges[None, 1:]) - np.maximum(left, xEdges[None, :-1]), 0, None)
+    np.add.at(area, cellRows[spanScanlines], lengths * spacing[spanScanlines, None])
+    return (area / (heights[:, None] * widths[None, :]))[::-1]
+
+def glyphCoverage(contours, cells: tuple, step: float = 1) -> np.ndarray:
+    """
+    Returns the `cellCoverage` of `contours` in the `gridCells` `cells`.
+    """
+    return cellCoverage(outlineEdges(contours), *cells, step)
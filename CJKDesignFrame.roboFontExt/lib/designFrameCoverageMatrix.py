@@ -0,0 +1,179 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Font-wide ink coverage matrix of the hangul grid cells.
+
+    python designFrameCoverageMatrix.py MyFont.ufo coverage.csv --workers 8
+
+The coverage of every glyph in every grid cell of the frame (see
+`designFrameCoverage`) is computed in a process pool, cached per glyph
+hash next to the UFO, and written as CSV, JSON or a NumPy `.npz` file.
+Each glyph also gets the ink share of its whole character face and how
+far it lies from the median of the font, to spot the syllables too
+light or too dark at a glance.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import designFrameCache
+import designFrameCoverage
+import designFrameUFO
+from designFrame import designFrameFromLib
+
+# part of the settings key of the cached results, bump when results change
+COVERAGE_VERSION = 1
+
+_worker = {}
+
+def _initWorker(path: str, settings: dict, step: float):
+    _worker["glyphSet"] = designFrameUFO.openFont(path).getGlyphSet()
+    _worker["cells"] = designFrameCoverage.gridCells(designFrameFromLib(settings))
+    _worker["step"] = step
+
+def _coverageChunk(glyphNames: list) -> list:
+    results = []
+    for glyphName in glyphNames:
+        contours = designFrameUFO.readContours(_worker["glyphSet"], glyphName)
+        coverage = designFrameCoverage.glyphCoverage(contours, _worker["cells"], _worker["step"])
+        results.append((glyphName, coverage.round(5).tolist()))
+    return results
+
+def loadCoverage(path: str, 
+        glyphNames: list = None, 
+        settings: dict = None, 
+        step: float = 1, 
+        workers: int = None, 
+        cachePath: str = None, 
+        chunkSize: int = 200) -> dict:
+    """
+    Returns the coverage of the glyphs of the UFO at `path`: their
+    `names`, the `coverage` as a `(glyphs, rows, columns)` array, first
+    row on top, and the `xEdges` and `yEdges` of the cells. Results are
+    cached per glyph hash, so only modified glyphs are computed again.
+    """
+    reader = designFrameUFO.openFont(path)
+    if settings is None:
+        settings = designFrameUFO.readSettings(reader)
+    designFrame = designFrameFromLib(settings)
+    glyphSet = reader.getGlyphSet()
+    if glyphNames is None:
+        glyphNames = sorted(glyphSet.keys())
+    hasher = designFrameUFO.GlyphHasher(glyphSet)
+    cache = designFrameCache.GlyphResultCache(
+        cachePath or designFrameCache.defaultCachePath(path, "designFrameCoverage"),
+        designFrameCache.settingsKey(designFrame, step = step, version = COVERAGE_VERSION)
+        )
+    coverages = {}
+    stale = []
+    for glyphName in glyphNames:
+        result = cache.get(glyphName, hasher.hash(glyphName))
+        if result is None:
+            stale.append(glyphName)
+        else:
+            coverages[glyphName] = result
+    if stale:
+        chunks = [stale[i:i + chunkSize] for i in range(0, len(stale), chunkSize)]
+        initargs = (path, settings, step)
+        if workers == 1 or len(chunks) == 1:
+            _initWorker(*initargs)
+            results = list(map(_coverageChunk, chunks))
+        else:
+            with ProcessPoolExecutor(max_workers = workers, initializer = _initWorker, initargs = initargs) as executor:
+                results = list(executor.map(_coverageChunk, chunks))
+        for chunk in results:
+            for glyphName, result in chunk:
+                cache.set(glyphName, hasher.hash(glyphName), result)
+                coverages[glyphName] = result
+        cache.prune(glyphSet.keys())
+        cache.save()
+
+    xEdges, yEdges = designFrameCoverage.gridCells(designFrame)
+    shape = (len(yEdges) - 1, len(xEdges) - 1)
+    return dict(
+        names = np.array(glyphNames),
+        coverage = np.array([coverages[name] for name in glyphNames], dtype=float).reshape(-1, *shape),
+        xEdges = xEdges,
+        yEdges = yEdges,
+        )
+
+def faceCoverage(matrix: dict) -> np.ndarray:
+    """
+    Returns the ink share of the whole character face of each glyph.
+    """
+    areas = np.outer(np.diff(matrix["yEdges"])[::-1], np.diff(matrix["xEdges"]))
+    return (matrix["coverage"] * areas).sum(axis = (1, 2)) / areas.sum()
+
+def writeCSV(matrix: dict, file):
+    rows, columns = matrix["coverage"].shape[1:]
+    face = faceCoverage(matrix)
+    median = float(np.median(face)) if len(face) else 0.
+    writer = csv.writer(file)
+    writer.writerow(["glyph", "face", "deviation"] + [f"r{row + 1}c{column + 1}" for row in range(rows) for column in range(columns)])
+    for name, share, coverage in zip(matrix["names"], face, matrix["coverage"]):
+        writer.writerow([name, f"{share:.4f}", f"{share - median:+.4f}"] + [f"{value:.4f}" for value in coverage.ravel()])
+
+def writeJSON(matrix: dict, file):
+    face = faceCoverage(matrix)
+    json.dump(dict(
+        xEdges = matrix["xEdges"].tolist(),
+        yEdges = matrix["yEdges"].tolist(),
+        mean = matrix["coverage"].mean(axis = 0).round(5).tolist() if len(face) else [],
+        medianFace = float(np.median(face)) if len(face) else 0.,
+        glyphs = {
+            str(name): dict(face = round(float(share), 5), coverage = coverage.round(5).tolist()) 
+            for name, share, coverage in zip(matrix["names"], face, matrix["coverage"])
+            },
+        ), file)
+
+def main(args = None) -> int:
+    parser = argparse.ArgumentParser(description = "Write the ink coverage of every glyph of a UFO per CJK design frame grid cell.")
+    parser.add_argument("ufo", help = "path of the UFO")
+    parser.add_argument("output", help = "output .csv, .json or .npz file")
+    parser.add_argument("--settings", help = "a .CJKDesignFrameSettings file to use instead of the font lib")
+    parser.add_argument("--glyphs", nargs = "*", help = "glyph names to measure (default: all)")
+    parser.add_argument("--step", type = float, default = 1, help = "scanline spacing in FU (default: 1)")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "number of worker processes")
+    parser.add_argument("--cache", help = "result cache file (default: next to the UFO)")
+    options = parser.parse_args(args)
+
+    settings = None
+    if options.settings:
+        with open(options.settings, 'r', encoding = "utf-8") as file:
+            settings = json.load(file)
+
+    matrix = loadCoverage(options.ufo, options.glyphs, settings, options.step, options.workers, options.cache)
+    extension = os.path.splitext(options.output)[1].lower()
+    if extension == ".npz":
+        np.savez_compressed(options.output, **matrix)
+    else:
+        with open(options.output, 'w', encoding = "utf-8", newline = "") as file:
+            (writeJSON if extension == ".json" else writeCSV)(matrix, file)
+    sys.stderr.write(f"{len(matrix['names'])} glyphs written\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
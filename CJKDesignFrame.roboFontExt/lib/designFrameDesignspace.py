@@ -0,0 +1,276 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Design frame settings across the masters of a designspace.
+
+    python designFrameDesignspace.py MyFamily.designspace --location Weight=500
+    python designFrameDesignspace.py MyFamily.designspace --audit --workers 8
+    python designFrameDesignspace.py MyFamily.designspace --write [--sync]
+
+Each master keeps its own `CJKDesignFrameSettings` in its lib. Masters
+without settings, and any other location, get the numeric values
+(`characterFace`, `overshoot`, `shift` and the line values) interpolated
+from the masters that have some; the other values are taken from the
+default master. With `--write`, the interpolated settings are stored in
+the lib of the masters without settings, so RoboFont shows them too.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from fontTools.designspaceLib import DesignSpaceDocument
+from fontTools.varLib.models import VariationModel
+
+import designFrameAudit
+import designFrameProximity
+import designFrameUFO
+from designFrame import designFrameFromLib
+
+INTERPOLATED_KEYS = ("characterFace", "overshoot", "shift", "horizontalLine", "verticalLine")
+
+def _flatten(settings: dict) -> tuple:
+    values, shapes = [], []
+    for key in INTERPOLATED_KEYS:
+        value = settings[key]
+        shapes.append(len(value) if isinstance(value, (list, tuple)) else None)
+        values.extend(value if shapes[-1] is not None else [value])
+    return np.array(values, dtype=float), tuple(shapes)
+
+def _unflatten(values: np.ndarray, shapes: tuple) -> dict:
+    settings, i = {}, 0
+    for key, shape in zip(INTERPOLATED_KEYS, shapes):
+        if shape is None:
+            settings[key] = float(values[i])
+            i += 1
+        else:
+            settings[key] = [float(v) for v in values[i:i + shape]]
+            i += shape
+    return settings
+
+def _locationKey(location: dict) -> tuple:
+    return tuple(sorted(location.items()))
+
+class DesignspaceFrames:
+    """
+    Lazily reads the settings of the masters of the designspace at `path`
+    and memoizes the settings interpolated at each location.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.document = DesignSpaceDocument.fromfile(path)
+        self.sources = self.document.sources
+        self.default = self.document.findDefault()
+        if self.default is None:
+            raise ValueError(f"{path} has no default master")
+        self._masterSettings = None
+        self._model = None
+        self._settings = {}
+
+    def sourceName(self, source) -> str:
+        return source.name or os.path.basename(source.path)
+
+    def masterSettings(self) -> dict:
+        """
+        Returns `{sourceName: settings}` for the masters with settings.
+        """
+        if self._masterSettings is None:
+            self._masterSettings = {}
+            for source in self.sources:
+                if source.layerName: continue
+                settings = designFrameUFO.readSettings(designFrameUFO.openFont(source.path))
+                if settings:
+                    self._masterSettings[self.sourceName(source)] = designFrameFromLib(settings).get()
+        return self._masterSettings
+
+    def _buildModel(self):
+        masterSettings = self.masterSettings()
+        defaultName = self.sourceName(self.default)
+        if defaultName not in masterSettings:
+            raise ValueError(f"the default master {defaultName} has no design frame settings")
+        sources = [source for source in self.sources if self.sourceName(source) in masterSettings and not source.layerName]
+        flattened = [_flatten(masterSettings[self.sourceName(source)]) for source in sources]
+        shapes = {shape for _, shape in flattened}
+        if len(shapes) > 1:
+            raise ValueError("the design frame settings of the masters are not compatible")
+        locations = [self.normalize(source.location) for source in sources]
+        model = VariationModel(locations, axisOrder = [axis.name for axis in self.document.axes])
+        self._model = model, model.getDeltas([values for values, _ in flattened]), shapes.pop()
+
+    def normalize(self, location: dict) -> dict:
+        location = {**self.document.newDefaultLocation(), **location}
+        return {axis: value for axis, value in self.document.normalizeLocation(location).items() if value}
+
+    def settingsAt(self, location: dict) -> dict:
+        """
+        Returns the settings at the design `location`, a dict of axis
+        names and design coordinates.
+        """
+        normalized = self.normalize(location)
+        key = _locationKey(normalized)
+        if key not in self._settings:
+            if self._model is None:
+                self._buildModel()
+            model, deltas, shapes = self._model
+            settings = dict(self.masterSettings()[self.sourceName(self.default)])
+            settings.update(_unflatten(model.interpolateFromDeltas(normalized, deltas), shapes))
+            self._settings[key] = settings
+        return dict(self._settings[key])
+
+    def reload(self):
+        """
+        Forgets the master settings read so far, after the libs changed.
+        """
+        self._masterSettings = None
+        self._model = None
+        self._settings.clear()
+
+    def designFrameAt(self, location: dict):
+        return designFrameFromLib(self.settingsAt(location))
+
+    def sourceSettings(self) -> dict:
+        """
+        Returns `{sourceName: (path, settings)}` for every master, with the
+        interpolated settings for the masters without their own.
+        """
+        masterSettings = self.masterSettings()
+        return {
+            self.sourceName(source): (source.path, masterSettings.get(self.sourceName(source)) or self.settingsAt(source.location))
+            for source in self.sources if not source.layerName
+            }
+
+def _rounded(settings: dict) -> dict:
+    # the settings window only edits whole units
+    settings = dict(settings)
+    for key in INTERPOLATED_KEYS:
+        value = settings[key]
+        settings[key] = [round(v) for v in value] if isinstance(value, (list, tuple)) else round(value)
+    return settings
+
+def writeMasterSettings(frames: DesignspaceFrames, sync: bool = False) -> list:
+    """
+    Stores the interpolated settings, rounded to whole units, in the lib
+    of every master without settings. With `sync`, the masters with
+    settings also get the values of the default master that are not
+    interpolated, such as the em dimension, the type and the customs
+    frames. Returns the names of the masters written.
+    """
+    masterSettings = frames.masterSettings()
+    defaultName = frames.sourceName(frames.default)
+    written = []
+    for source in frames.sources:
+        name = frames.sourceName(source)
+        if source.layerName or name == defaultName: continue
+        own = masterSettings.get(name)
+        if own is None:
+            settings = _rounded(frames.settingsAt(source.location))
+        elif sync:
+            settings = {**masterSettings[defaultName], **{key: own[key] for key in INTERPOLATED_KEYS}}
+            if settings == own: continue
+        else:
+            continue
+        designFrameUFO.writeSettings(source.path, designFrameFromLib(settings).get())
+        written.append(name)
+    frames.reload()
+    return written
+
+_worker = {}
+
+def _auditTask(task: tuple) -> list:
+    masterName, path, settings, tolerance, glyphNames = task
+    if _worker.get("path") != path:
+        _worker["path"] = path
+        _worker["glyphSet"] = designFrameUFO.openFont(path).getGlyphSet()
+    edges = designFrameProximity.proximityEdges(designFrameFromLib(settings))
+    results = []
+    for glyphName in glyphNames:
+        contours = designFrameUFO.readContours(_worker["glyphSet"], glyphName)
+        issues = designFrameAudit.auditContours(contours, edges, tolerance)
+        results.append(dict(master = masterName, glyph = glyphName, issues = issues))
+    return results
+
+def auditDesignspace(frames: DesignspaceFrames,
+        glyphNames: list = None,
+        tolerance: int = 3,
+        workers: int = None,
+        chunkSize: int = 200):
+    """
+    Audits every master against its own settings in one process pool and
+    yields one `dict(master, glyph, issues)` per glyph, master by master.
+    """
+    tasks = []
+    for masterName, (path, settings) in frames.sourceSettings().items():
+        names = glyphNames
+        if names is None:
+            names = sorted(designFrameUFO.openFont(path).getGlyphSet().keys())
+        for chunk in designFrameAudit._chunks(names, chunkSize):
+            tasks.append((masterName, path, settings, tolerance, chunk))
+    if workers == 1:
+        for task in tasks:
+            yield from _auditTask(task)
+        return
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        for results in executor.map(_auditTask, tasks):
+            yield from results
+
+def _parseLocation(values: list) -> dict:
+    location = {}
+    for value in values or []:
+        axis, _, coordinate = value.partition("=")
+        location[axis] = float(coordinate)
+    return location
+
+def main(args = None) -> int:
+    parser = argparse.ArgumentParser(description = "Interpolate and audit the CJK design frame across the masters of a designspace.")
+    parser.add_argument("designspace", help = "path of the .designspace file")
+    parser.add_argument("--location", nargs = "*", metavar = "AXIS=VALUE", help = "print the settings at this design location")
+    parser.add_argument("--instances", action = "store_true", help = "print the settings of every instance")
+    parser.add_argument("--audit", action = "store_true", help = "audit every master against its settings")
+    parser.add_argument("--write", action = "store_true", help = "store the interpolated settings in the lib of the masters without settings")
+    parser.add_argument("--sync", action = "store_true", help = "with --write, also copy the values of the default master that are not interpolated to every master")
+    parser.add_argument("--glyphs", nargs = "*", help = "glyph names to audit (default: all)")
+    parser.add_argument("--tolerance", type = int, default = 3, help = "proximity tolerance in FU (default: 3)")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "number of worker processes")
+    parser.add_argument("--chunk-size", type = int, default = 200, help = "glyphs per worker task")
+    options = parser.parse_args(args)
+
+    frames = DesignspaceFrames(options.designspace)
+    if options.write:
+        for name in writeMasterSettings(frames, options.sync):
+            sys.stderr.write(f"{name} settings written\n")
+    if options.location is not None:
+        sys.stdout.write(json.dumps(frames.settingsAt(_parseLocation(options.location))) + "\n")
+    if options.instances:
+        for instance in frames.document.instances:
+            sys.stdout.write(json.dumps(dict(instance = instance.name, settings = frames.settingsAt(instance.location))) + "\n")
+    failures = 0
+    if options.audit:
+        for result in auditDesignspace(frames, options.glyphs, options.tolerance, options.workers, options.chunk_size):
+            if result["issues"]:
+                failures += 1
+                sys.stdout.write(json.dumps(result) + "\n")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
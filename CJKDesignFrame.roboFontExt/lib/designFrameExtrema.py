@@ -0,0 +1,157 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Curve-extrema-aware overshoot checking.
+
+Control points lie outside the outline they shape, and on-curve points
+miss the extremes of round strokes, so the outline bounds are taken from
+the segment end points and the extrema of every quadratic and cubic
+segment, solved for all segments of a glyph at once.
+"""
+
+import numpy as np
+from fontTools.pens.basePen import decomposeQuadraticSegment, decomposeSuperBezierSegment
+
+def _addSegment(start: tuple, offCurves: list, end: tuple, segmentType: str, lines: list, quadratics: list, cubics: list):
+    if not offCurves or segmentType in ("line", "move"):
+        lines.append((start, end))
+    elif segmentType == "qcurve" or len(offCurves) == 1:
+        for offCurve, onCurve in decomposeQuadraticSegment(offCurves + [end]):
+            quadratics.append((start, offCurve, onCurve))
+            start = onCurve
+    elif len(offCurves) == 2:
+        cubics.append((start, offCurves[0], offCurves[1], end))
+    else:
+        for pt1, pt2, pt3 in decomposeSuperBezierSegment(offCurves + [end]):
+            cubics.append((start, pt1, pt2, pt3))
+            start = pt3
+
+def segments(contours) -> tuple:
+    """
+    Returns the `(lines, quadratics, cubics)` of `contours`, recorded as
+    `(x, y, segmentType)` points, as arrays of shape `(n, 2, 2)`,
+    `(n, 3, 2)` and `(n, 4, 2)`.
+    """
+    lines, quadratics, cubics = [], [], []
+    for contour in contours:
+        if not contour: continue
+        points = [((x, y), segmentType) for x, y, segmentType in contour]
+        closed = points[0][1] != "move"
+        onCurves = [i for i, (point, segmentType) in enumerate(points) if segmentType is not None]
+        if not onCurves:
+            # quadratic contour without on-curve point
+            (x0, y0), (x1, y1) = points[-1][0], points[0][0]
+            start = ((x0 + x1) * .5, (y0 + y1) * .5)
+            _addSegment(start, [point for point, segmentType in points], start, "qcurve", lines, quadratics, cubics)
+            continue
+        if closed:
+            first = onCurves[0]
+            points = points[first:] + points[:first + 1]
+        start, offCurves = points[0][0], []
+        for point, segmentType in points[1:]:
+            if segmentType is None:
+                offCurves.append(point)
+                continue
+            _addSegment(start, offCurves, point, segmentType, lines, quadratics, cubics)
+            start, offCurves = point, []
+    return (
+        np.array(lines, dtype=float).reshape(-1, 2, 2),
+        np.array(quadratics, dtype=float).reshape(-1, 3, 2),
+        np.array(cubics, dtype=float).reshape(-1, 4, 2),
+        )
+
+def _inside(t: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid = "ignore"):
+        return (t > 0) & (t < 1)
+
+def quadraticExtrema(quadratics: np.ndarray) -> np.ndarray:
+    """
+    Returns the points of the `(n, 3, 2)` quadratic segments where `x` or
+    `y` reaches an extremum inside the segment.
+    """
+    p0, p1, p2 = quadratics[:, 0], quadratics[:, 1], quadratics[:, 2]
+    denominator = p0 - 2 * p1 + p2
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        t = np.where(denominator != 0, (p0 - p1) / denominator, np.nan)
+    index, axis = np.nonzero(_inside(t))
+    t = t[index, axis][:, None]
+    mt = 1 - t
+    return mt * mt * p0[index] + 2 * mt * t * p1[index] + t * t * p2[index]
+
+def cubicExtrema(cubics: np.ndarray) -> np.ndarray:
+    """
+    Returns the points of the `(n, 4, 2)` cubic segments where `x` or `y`
+    reaches an extremum inside the segment.
+    """
+    p0, p1, p2, p3 = cubics[:, 0], cubics[:, 1], cubics[:, 2], cubics[:, 3]
+    # the derivative, divided by 3, is a t² + b t + c
+    a = p3 - 3 * p2 + 3 * p1 - p0
+    b = 2 * (p2 - 2 * p1 + p0)
+    c = p1 - p0
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        root = np.sqrt(b * b - 4 * a * c)
+        quadratic = np.abs(a) > 1e-9
+        t1 = np.where(quadratic, (-b + root) / (2 * a), np.where(b != 0, -c / b, np.nan))
+        t2 = np.where(quadratic, (-b - root) / (2 * a), np.nan)
+    t = np.stack([t1, t2], axis = -1)
+    index, axis, which = np.nonzero(_inside(t))
+    t = t[index, axis, which][:, None]
+    mt = 1 - t
+    return mt ** 3 * p0[index] + 3 * mt * mt * t * p1[index] + 3 * mt * t * t * p2[index] + t ** 3 * p3[index]
+
+def extremePoints(contours) -> np.ndarray:
+    """
+    Returns the `(n, 2)` points of `contours` that can reach the outline
+    bounds: the end points and the extrema of the segments.
+    """
+    lines, quadratics, cubics = segments(contours)
+    return np.concatenate([
+        lines.reshape(-1, 2), 
+        quadratics[:, ::2].reshape(-1, 2), 
+        cubics[:, ::3].reshape(-1, 2),
+        quadraticExtrema(quadratics), 
+        cubicExtrema(cubics),
+        ])
+
+def overshootIssues(points: np.ndarray, edges: dict) -> list:
+    """
+    Returns one `outsideOvershoot` issue per side where the extreme
+    `points` of an outline leave the overshoot band, with the farthest
+    `value`, the band `limit` and every `points` outside.
+    """
+    issues = []
+    if not len(points):
+        return issues
+    x, y = points[:, 0], points[:, 1]
+    for side, values, limit, outside in [
+            ("left", x, edges["bandXLow"][0], x < edges["bandXLow"][0]),
+            ("right", x, edges["bandXHigh"][1], x > edges["bandXHigh"][1]),
+            ("bottom", y, edges["bandYLow"][0], y < edges["bandYLow"][0]),
+            ("top", y, edges["bandYHigh"][1], y > edges["bandYHigh"][1]),
+            ]:
+        if not outside.any(): continue
+        value = values[outside].min() if side in ("left", "bottom") else values[outside].max()
+        # extrema of adjacent segments meet on the same point
+        selected = np.unique(np.round(points[outside], 2), axis = 0)
+        issues.append(dict(type = "outsideOvershoot", side = side, value = float(value), limit = float(limit), points = selected.tolist()))
+    return issues
+
+def checkContours(contours, edges: dict) -> list:
+    return overshootIssues(extremePoints(contours), edges)
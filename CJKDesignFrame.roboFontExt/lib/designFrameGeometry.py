@@ -0,0 +1,270 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Pure-Python frame geometry.
+
+Everything here is computed in font units from a `DesignFrame` and
+returned as plain tuples, so it runs without RoboFont (batch jobs,
+benchmarks). Rectangles are `(x, y, width, height)`, lines are
+`((x0, y0), (x1, y1))` and polygons are tuples of `(x, y)` points.
+"""
+
+import functools
+import math
+
+def otRound(value: float) -> int:
+    return int(math.floor(value + .5))
+
+def roundPoint(point: tuple) -> tuple:
+    return otRound(point[0]), otRound(point[1])
+
+def rectPolygon(x: float, y: float, width: float, height: float) -> tuple:
+    return (x, y), (x, y + height), (x + width, y + height), (x + width, y)
+
+def getEmRatioFrame(frame: int, w: int, h: int) -> tuple:
+    charfaceW = w * frame / 100
+    charfaceH = h * frame / 100
+    x = (w - charfaceW) * .5
+    y = (h - charfaceH) * .5
+    return x, y, charfaceW, charfaceH
+
+def makeSquare(x: float, y: float, width: float, height: float) -> tuple:
+    return tuple(roundPoint(p) for p in rectPolygon(x, y, width, height))
+
+def makeOvershoot(
+        origin_x: float, 
+        origin_y: float, 
+        width: float, 
+        height: float, 
+        outside: int, 
+        inside: int) -> tuple:
+    ox = origin_x - outside
+    oy = origin_y - outside
+    outer = (
+        (ox, oy),
+        (ox + width + 2 * outside, oy),
+        (ox + width + 2 * outside, oy + height + 2 * outside),
+        (ox, oy + height + 2 * outside),
+        )
+    inner = rectPolygon(
+        origin_x + inside, 
+        origin_y + inside, 
+        width - 2 * inside, 
+        height - 2 * inside
+        )
+    return tuple(roundPoint(p) for p in outer), tuple(roundPoint(p) for p in inner)
+
+def makeHorSecLines(x: float, y: float, width: float, top: float) -> tuple:
+    return (
+        (roundPoint((x, y)), roundPoint((x + width, y))),
+        (roundPoint((x, top)), roundPoint((x + width, top))),
+        )
+
+def makeVerSecLines(x: float, y: float, right: float, height: float) -> tuple:
+    return (
+        (roundPoint((x, y)), roundPoint((x, y + height))),
+        (roundPoint((right, y)), roundPoint((right, y + height))),
+        )
+
+def gridPositions(origin: float, length: float, step: int, positions: tuple = ()) -> tuple:
+    """
+    Returns the rounded positions of the grid lines across `length` from
+    `origin`: at the `positions` percentages of `length` if any are given,
+    else evenly spaced in `step` cells.
+    """
+    if positions:
+        ratios = sorted(p / 100 for p in positions if 0 < p < 100)
+    else:
+        ratios = [i / step for i in range(1, max(int(step), 1))]
+    return tuple(sorted(set(otRound(origin + length * ratio) for ratio in ratios)))
+
+@functools.lru_cache(maxsize = 64)
+def gridLines(frame: tuple, 
+        horizontalStep: int, 
+        verticalStep: int, 
+        horizontalPositions: tuple = (), 
+        verticalPositions: tuple = ()) -> tuple:
+    """
+    Returns the `(horizontal, vertical)` grid lines inside the character
+    face `frame`, cached per arguments.
+    """
+    x, y, w, h = frame
+    left, bottom, right, top = otRound(x), otRound(y), otRound(x + w), otRound(y + h)
+    horizontal = tuple(((left, dist), (right, dist)) for dist in gridPositions(y, h, horizontalStep, horizontalPositions))
+    vertical = tuple(((dist, bottom), (dist, top)) for dist in gridPositions(x, w, verticalStep, verticalPositions))
+    return horizontal, vertical
+
+def secondLinePositions(designFrame) -> tuple:
+    """
+    Returns the `(bottom, top)` and `(left, right)` positions of the han
+    second lines.
+    """
+    w, h = designFrame.em_Dimension
+    ratio = h * .5 * (designFrame.horizontalLine / 50)
+    horizontal = h * .5 - ratio, h * .5 + ratio
+    ratio = w * .5 * (designFrame.verticalLine / 50)
+    vertical = w * .5 - ratio, w * .5 + ratio
+    return horizontal, vertical
+
+def frameGeometry(designFrame) -> dict:
+    """
+    Returns every element of the design frame of `designFrame` in font
+    units, before the `shift` translation is applied.
+    """
+    w, h = designFrame.em_Dimension
+    frame = getEmRatioFrame(designFrame.characterFace, w, h)
+    outside, inside = designFrame.overshoot
+    geometry = {
+        "emSquare": makeSquare(0, 0, w, h),
+        "frame": frame,
+        "characterFace": makeSquare(*frame),
+        "overshoot": makeOvershoot(*frame, outside, inside),
+        "horizontalSecondLines": (),
+        "verticalSecondLines": (),
+        "horizontalGrid": (),
+        "verticalGrid": (),
+        }
+    if designFrame.type == "han":
+        (bottom, top), (left, right) = secondLinePositions(designFrame)
+        geometry["horizontalSecondLines"] = makeHorSecLines(0, bottom, w, top)
+        geometry["verticalSecondLines"] = makeVerSecLines(left, 0, right, h)
+    else:
+        geometry["horizontalGrid"], geometry["verticalGrid"] = gridLines(
+            frame, 
+            int(designFrame.horizontalLine), 
+            int(designFrame.verticalLine), 
+            tuple(designFrame.horizontalGrid), 
+            tuple(designFrame.verticalGrid)
+            )
+    geometry["customsFrames"] = tuple(
+        getEmRatioFrame(frame.value, w, h) 
+        for frame in designFrame.customsFrames
+        )
+    return geometry
+
+FRAMES = "frames"
+OVERSHOOT = "overshoot"
+SECOND_LINES = "secondLines"
+CUSTOMS_FRAMES = "customsFrames"
+
+# (fill, stroke) RGBA colors of each style
+STYLES = {
+    FRAMES: (None, (0, 0, 0, 1)),
+    OVERSHOOT: ((0, .75, 1, .3), None),
+    SECOND_LINES: (None, (.65, 0.16, .39, 1)),
+    CUSTOMS_FRAMES: (None, (0, 0, 0, 1)),
+    }
+
+def translateContours(contours: tuple, dx: float, dy: float) -> tuple:
+    if not dx and not dy:
+        return tuple(contours)
+    return tuple(tuple((x + dx, y + dy) for x, y in contour) for contour in contours)
+
+def displayList(geometry: dict, 
+        translate_secondLine_X: int = 0, 
+        translate_secondLine_Y: int = 0) -> tuple:
+    """
+    Compiles `geometry` into one `(style, contours)` entry per drawing
+    style, in drawing order, so each style can be drawn as a single path.
+    """
+    secondLines = translateContours(geometry["horizontalSecondLines"], 0, translate_secondLine_Y) \
+        + translateContours(geometry["verticalSecondLines"], translate_secondLine_X, 0) \
+        + geometry["horizontalGrid"] \
+        + geometry["verticalGrid"]
+    return (
+        (FRAMES, (geometry["emSquare"], geometry["characterFace"])),
+        (OVERSHOOT, geometry["overshoot"]),
+        (SECOND_LINES, secondLines),
+        (CUSTOMS_FRAMES, tuple(rectPolygon(*frame) for frame in geometry["customsFrames"])),
+        )
+
+def zoomBucket(scale: float) -> int:
+    """
+    Returns the half-octave bucket of the glyph view `scale` (font units
+    per screen pixel).
+    """
+    return round(math.log2(max(scale, 1e-6)) * 2)
+
+def bucketScale(bucket: int) -> float:
+    return 2 ** (bucket / 2)
+
+def thinLines(lines: tuple, axis: int, minSpacing: float) -> tuple:
+    """
+    Drops the lines closer than `minSpacing` to the previous line kept,
+    `axis` being the coordinate the lines are spaced along.
+    """
+    kept = []
+    for line in sorted(lines, key = lambda line: line[0][axis]):
+        if kept and line[0][axis] - kept[-1][0][axis] < minSpacing: continue
+        kept.append(line)
+    return tuple(kept)
+
+def thinFrames(frames: tuple, minSize: float) -> tuple:
+    """
+    Drops the custom frames smaller than `minSize`, and merges the frames
+    whose edges are less than `minSize` apart.
+    """
+    kept = []
+    for frame in sorted(frames, key = lambda frame: frame[2]):
+        if frame[2] < minSize or frame[3] < minSize: continue
+        if kept and abs(frame[0] - kept[-1][0]) < minSize and abs(frame[1] - kept[-1][1]) < minSize: continue
+        kept.append(frame)
+    return tuple(kept)
+
+def levelOfDetail(geometry: dict, scale: float, pixelThreshold: float = 4) -> dict:
+    """
+    Returns a copy of `geometry` without the grid lines closer than
+    `pixelThreshold` screen pixels and the custom frames collapsing under
+    a pixel, at the glyph view `scale`.
+    """
+    lodGeometry = dict(geometry)
+    lodGeometry["horizontalGrid"] = thinLines(geometry["horizontalGrid"], 1, pixelThreshold * scale)
+    lodGeometry["verticalGrid"] = thinLines(geometry["verticalGrid"], 0, pixelThreshold * scale)
+    lodGeometry["customsFrames"] = thinFrames(geometry["customsFrames"], scale)
+    return lodGeometry
+
+def contourBounds(contour: tuple) -> tuple:
+    xs = [x for x, y in contour]
+    ys = [y for x, y in contour]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def boundsIntersect(a: tuple, b: tuple) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+def contourVisible(contour: tuple, bounds: tuple, filled: bool = False) -> bool:
+    """
+    Returns True if `contour` shows in `bounds` (xMin, yMin, xMax, yMax):
+    its area if `filled`, else one of its edges.
+    """
+    if filled or len(contour) < 3:
+        return boundsIntersect(contourBounds(contour), bounds)
+    for i, start in enumerate(contour):
+        if boundsIntersect(contourBounds((start, contour[i - 1])), bounds):
+            return True
+    return False
+
+def cullDisplayList(displayList: tuple, bounds: tuple) -> tuple:
+    """
+    Keeps only the contours of `displayList` showing in `bounds`.
+    """
+    return tuple(
+        (style, tuple(contour for contour in contours if contourVisible(contour, bounds, style == OVERSHOOT)))
+        for style, contours in displayList
+        )
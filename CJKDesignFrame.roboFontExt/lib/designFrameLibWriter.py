@@ -0,0 +1,85 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Debounced persistence of the design frame settings to the font lib.
+"""
+
+from designFrame import SETTINGS_KEY
+
+class DebouncedLibWriter:
+    """
+    Holds the last staged settings in memory and writes them to the font
+    lib once no new settings were staged for `delay` seconds, or when
+    `commit` is called. Writes that would not change the lib are skipped,
+    so the font is not marked dirty for nothing. `schedule(delay,
+    function)` must call `function` once after `delay` seconds, on the
+    main thread. Staged settings are not copied, stage a new dict such as
+    the one returned by `DesignFrame.get()`.
+    """
+
+    def __init__(self, schedule, delay: float = .5, key: str = SETTINGS_KEY):
+        self.schedule = schedule
+        self.delay = delay
+        self.key = key
+        self._font = None
+        self._settings = None
+        self._generation = 0
+        self.staged = 0
+        self.written = 0
+        self.skipped = 0
+
+    @property
+    def pending(self) -> bool:
+        return self._font is not None
+
+    def pendingFor(self, naked) -> bool:
+        """
+        Whether settings are staged for the font wrapping the defcon font
+        `naked`.
+        """
+        return self._font is not None and self._font.naked() is naked
+
+    def stage(self, font, settings: dict):
+        if font is None: return
+        if self._font is not None and self._font is not font:
+            self.commit()
+        self._font = font
+        self._settings = settings
+        self._generation += 1
+        self.staged += 1
+        generation = self._generation
+        self.schedule(self.delay, lambda: self._commitGeneration(generation))
+
+    def _commitGeneration(self, generation: int):
+        if generation == self._generation:
+            self.commit()
+
+    def commit(self):
+        font, settings = self._font, self._settings
+        self._font = self._settings = None
+        if font is None: return
+        if font.lib.get(self.key) == settings:
+            self.skipped += 1
+            return
+        font.lib[self.key] = settings
+        self.written += 1
+
+    def discard(self):
+        self._font = self._settings = None
@@ -0,0 +1,56 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Point pens recording glyph contours as plain tuples, shared by the
+batch tools and the glyph window. They only depend on fontTools.pens,
+so loading them does not load ufoLib.
+"""
+
+from fontTools.pens.pointPen import AbstractPointPen
+from fontTools.pens.transformPen import TransformPointPen
+
+class GlyphAttributes:
+    """
+    Receives the width, unicodes and other attributes set by
+    `glyphSet.readGlyph`, ignored by the outline readers.
+    """
+
+class ContourRecordingPointPen(AbstractPointPen):
+    """
+    Records the contours of a glyph as lists of `(x, y, segmentType)`,
+    decomposing components through `glyphSet`.
+    """
+
+    def __init__(self, glyphSet = None):
+        self.glyphSet = glyphSet
+        self.contours = []
+
+    def beginPath(self, identifier = None, **kwargs):
+        self.contours.append([])
+
+    def endPath(self):
+        pass
+
+    def addPoint(self, pt, segmentType = None, smooth = False, name = None, identifier = None, **kwargs):
+        self.contours[-1].append((pt[0], pt[1], segmentType))
+
+    def addComponent(self, baseGlyphName, transformation, identifier = None, **kwargs):
+        if self.glyphSet is None or baseGlyphName not in self.glyphSet: return
+        self.glyphSet.readGlyph(baseGlyphName, GlyphAttributes(), TransformPointPen(self, transformation))
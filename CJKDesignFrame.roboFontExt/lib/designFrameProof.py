@@ -0,0 +1,346 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Paginated proofs of glyphs with their design frame overlay.
+
+    python designFrameProof.py MyFont.ufo proof.pdf --columns 6 --rows 8
+    python designFrameProof.py MyFont.ufo proofs/page.svg --glyphs "uni4E*"
+
+Pages are produced one at a time by a generator pipeline and written as
+soon as they are ready, so memory stays constant whatever the number of
+glyphs. Pages can be rendered in a process pool with `--workers`.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from fontTools.pens.basePen import BasePen
+from fontTools.pens.pointPen import PointToSegmentPen
+
+import designFrameGeometry
+import designFrameUFO
+from designFrame import designFrameFromLib
+
+PAGE_SIZES = {
+    "A4": (595, 842),
+    "A3": (842, 1191),
+    "letter": (612, 792),
+    }
+
+class ProofLayout:
+
+    def __init__(self, 
+            pageSize: tuple = PAGE_SIZES["A4"], 
+            columns: int = 6, 
+            rows: int = 8, 
+            margin: float = 36, 
+            labelSize: float = 7):
+        self.pageSize = pageSize
+        self.columns = columns
+        self.rows = rows
+        self.margin = margin
+        self.labelSize = labelSize
+
+    @property
+    def glyphsPerPage(self) -> int:
+        return self.columns * self.rows
+
+    def cells(self) -> list:
+        """
+        Returns the `(x, y, size)` glyph box of each cell, top to bottom,
+        in page coordinates (origin bottom left).
+        """
+        width, height = self.pageSize
+        cellWidth = (width - 2 * self.margin) / self.columns
+        cellHeight = (height - 2 * self.margin) / self.rows
+        size = min(cellWidth, cellHeight - self.labelSize * 2) * .9
+        cells = []
+        for row in range(self.rows):
+            for column in range(self.columns):
+                x = self.margin + column * cellWidth + (cellWidth - size) * .5
+                y = height - self.margin - (row + 1) * cellHeight + self.labelSize * 2
+                cells.append((x, y, size))
+        return cells
+
+class PathDataPen(BasePen):
+    """
+    Writes the drawn outlines as SVG path data or PDF path operators.
+    """
+
+    def __init__(self, fmt: str):
+        super().__init__(None)
+        self.fmt = fmt
+        self.data = []
+
+    def _point(self, *points) -> str:
+        return " ".join("%g %g" % (x, y) for x, y in points)
+
+    def _moveTo(self, pt):
+        self.data.append(("M %s" if self.fmt == "svg" else "%s m") % self._point(pt))
+
+    def _lineTo(self, pt):
+        self.data.append(("L %s" if self.fmt == "svg" else "%s l") % self._point(pt))
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        self.data.append(("C %s" if self.fmt == "svg" else "%s c") % self._point(pt1, pt2, pt3))
+
+    def _closePath(self):
+        self.data.append("Z" if self.fmt == "svg" else "h")
+
+    def _endPath(self):
+        pass
+
+    def getData(self) -> str:
+        return " ".join(self.data)
+
+def _polygonsData(contours: tuple, fmt: str) -> str:
+    pen = PathDataPen(fmt)
+    for contour in contours:
+        pen.moveTo(contour[0])
+        for point in contour[1:]:
+            pen.lineTo(point)
+        pen.closePath()
+    return pen.getData()
+
+def _glyphData(contours: list, fmt: str) -> str:
+    pen = PathDataPen(fmt)
+    designFrameUFO.drawContours(contours, PointToSegmentPen(pen))
+    return pen.getData()
+
+def _opaque(color: tuple) -> tuple:
+    r, g, b, a = color
+    return tuple(1 - a + a * c for c in (r, g, b))
+
+def _svgColor(color: tuple) -> str:
+    return "rgb(%s)" % ",".join("%d" % round(c * 255) for c in color[:3])
+
+def _pdfEscape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def renderPage(fmt: str, glyphSet, designFrame, layout: ProofLayout, glyphNames: list) -> str:
+    """
+    Returns the SVG document or the PDF content stream of one page.
+    """
+    geometry = designFrameGeometry.frameGeometry(designFrame)
+    displayList = designFrameGeometry.displayList(geometry)
+    shiftX, shiftY = designFrame.shift
+    emWidth, emHeight = designFrame.em_Dimension
+    overlay = [(style, _polygonsData(contours, fmt)) for style, contours in displayList if contours]
+    # the glyph is drawn over the frames and the overshoot band, under the lines
+    under = [(style, data) for style, data in overlay if style in (designFrameGeometry.FRAMES, designFrameGeometry.OVERSHOOT)]
+    over = [(style, data) for style, data in overlay if style not in (designFrameGeometry.FRAMES, designFrameGeometry.OVERSHOOT)]
+    pageWidth, pageHeight = layout.pageSize
+    out = []
+    if fmt == "svg":
+        out.append(f'<svg xmlns="http://www.w3.org/2000/svg" width="{pageWidth}" height="{pageHeight}" viewBox="0 0 {pageWidth} {pageHeight}">')
+    for (x, y, size), glyphName in zip(layout.cells(), glyphNames):
+        scale = size / max(emWidth, emHeight)
+        lineWidth = .5 / scale
+        contours = designFrameUFO.readContours(glyphSet, glyphName)
+        if fmt == "svg":
+            out.append(f'<g transform="matrix({scale:g} 0 0 {-scale:g} {x:g} {pageHeight - y:g})">')
+            out.append(f'<g transform="translate({shiftX:g} {shiftY:g})">')
+            glyph = f'<path d="{_glyphData(contours, fmt)}" fill="black" transform="translate({-shiftX:g} {-shiftY:g})"/>'
+            for style, data in under + [(None, None)] + over:
+                if style is None:
+                    out.append(glyph)
+                    continue
+                fillColor, strokeColor = designFrameGeometry.STYLES[style]
+                fillAttributes = f'fill="{_svgColor(fillColor)}" fill-opacity="{fillColor[3]:g}"' if fillColor else 'fill="none"'
+                strokeAttributes = f'stroke="{_svgColor(strokeColor)}" stroke-width="{lineWidth:g}"' if strokeColor else ''
+                out.append(f'<path d="{data}" {fillAttributes} {strokeAttributes} fill-rule="evenodd"/>')
+            out.append('</g></g>')
+            out.append(f'<text x="{x + size * .5:g}" y="{pageHeight - y + layout.labelSize * 1.5:g}" font-family="Helvetica" font-size="{layout.labelSize:g}" text-anchor="middle">{escape(glyphName)}</text>')
+        else:
+            out.append(f"q {scale:g} 0 0 {scale:g} {x:g} {y:g} cm {lineWidth:g} w")
+            out.append(f"q 1 0 0 1 {shiftX:g} {shiftY:g} cm")
+            for style, data in under + [(None, None)] + over:
+                if style is None:
+                    out.append(f"Q 0 g {_glyphData(contours, fmt)} f q 1 0 0 1 {shiftX:g} {shiftY:g} cm")
+                    continue
+                fillColor, strokeColor = designFrameGeometry.STYLES[style]
+                if fillColor:
+                    out.append("%g %g %g rg %s f*" % (*_opaque(fillColor), data))
+                if strokeColor:
+                    out.append("%g %g %g RG %s S" % (*_opaque(strokeColor), data))
+            out.append("Q Q")
+            out.append(f"BT /F1 {layout.labelSize:g} Tf {x:g} {y - layout.labelSize * 1.5:g} Td ({_pdfEscape(glyphName)}) Tj ET")
+    if fmt == "svg":
+        out.append("</svg>")
+    return "\n".join(out)
+
+class PDFWriter:
+    """
+    Writes a PDF one page at a time; only the object offsets are kept in
+    memory.
+    """
+
+    def __init__(self, file, pageSize: tuple):
+        self.file = file
+        self.pageSize = pageSize
+        self.offsets = {}
+        self.pages = []
+        self.nextObject = 4
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._writeObject(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    def _writeObject(self, number: int, body: bytes):
+        self.offsets[number] = self.file.tell()
+        self.file.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def addPage(self, content: str):
+        contentNumber, pageNumber = self.nextObject, self.nextObject + 1
+        self.nextObject += 2
+        data = zlib.compress(content.encode("latin-1", "replace"))
+        self._writeObject(contentNumber, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(data) + data + b"\nendstream")
+        self._writeObject(pageNumber, (
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %g %g] /Contents %d 0 R "
+            "/Resources << /Font << /F1 3 0 R >> >> >>" % (*self.pageSize, contentNumber)).encode("ascii"))
+        self.pages.append(pageNumber)
+
+    def close(self):
+        kids = " ".join("%d 0 R" % number for number in self.pages)
+        self._writeObject(2, ("<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.pages))).encode("ascii"))
+        self._writeObject(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.file.tell()
+        self.file.write(b"xref\n0 %d\n0000000000 65535 f \n" % self.nextObject)
+        for number in range(1, self.nextObject):
+            self.file.write(b"%010d 00000 n \n" % self.offsets[number])
+        self.file.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self.nextObject, xref))
+
+def paginate(glyphNames, glyphsPerPage: int):
+    page = []
+    for glyphName in glyphNames:
+        page.append(glyphName)
+        if len(page) == glyphsPerPage:
+            yield page
+            page = []
+    if page:
+        yield page
+
+_worker = {}
+
+def _initWorker(path: str, settings: dict, fmt: str, layout: ProofLayout):
+    _worker["glyphSet"] = designFrameUFO.openFont(path).getGlyphSet()
+    _worker["designFrame"] = designFrameFromLib(settings)
+    _worker["fmt"] = fmt
+    _worker["layout"] = layout
+
+def _renderPage(glyphNames: list) -> str:
+    return renderPage(_worker["fmt"], _worker["glyphSet"], _worker["designFrame"], _worker["layout"], glyphNames)
+
+def _orderedMap(executor, function, iterable, window: int):
+    """
+    Like `executor.map`, but only keeps `window` tasks in flight so the
+    input is consumed lazily.
+    """
+    pending = []
+    for item in iterable:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+def proofPages(path: str, 
+        fmt: str = "pdf", 
+        layout: ProofLayout = None, 
+        glyphNames = None, 
+        settings: dict = None, 
+        workers: int = 1):
+    """
+    Yields the rendered pages of the proof of the UFO at `path`, in order.
+    """
+    layout = layout or ProofLayout()
+    reader = designFrameUFO.openFont(path)
+    if settings is None:
+        settings = designFrameUFO.readSettings(reader)
+    if glyphNames is None:
+        glyphNames = sorted(reader.getGlyphSet().keys())
+    pages = paginate(glyphNames, layout.glyphsPerPage)
+    initargs = (path, settings, fmt, layout)
+    if workers == 1:
+        _initWorker(*initargs)
+        yield from map(_renderPage, pages)
+        return
+    with ProcessPoolExecutor(max_workers = workers, initializer = _initWorker, initargs = initargs) as executor:
+        yield from _orderedMap(executor, _renderPage, pages, (workers or os.cpu_count()) * 2)
+
+def writeProof(pages, outputPath: str, fmt: str, layout: ProofLayout) -> int:
+    """
+    Writes `pages` as they come: one PDF file, or one SVG file per page
+    numbered after `outputPath`. Returns the number of pages written.
+    """
+    count = 0
+    if fmt == "pdf":
+        with open(outputPath, "wb") as file:
+            writer = PDFWriter(file, layout.pageSize)
+            for content in pages:
+                writer.addPage(content)
+                count += 1
+            writer.close()
+    else:
+        root, extension = os.path.splitext(outputPath)
+        directory = os.path.dirname(root)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        for content in pages:
+            count += 1
+            with open(f"{root}-{count:04d}{extension or '.svg'}", "w", encoding = "utf-8") as file:
+                file.write(content)
+    return count
+
+def main(args = None) -> int:
+    parser = argparse.ArgumentParser(description = "Write PDF or SVG proofs of a UFO with its CJK design frame.")
+    parser.add_argument("ufo", help = "path of the UFO")
+    parser.add_argument("output", help = "output .pdf file, or .svg file name pattern (one file per page)")
+    parser.add_argument("--settings", help = "a .CJKDesignFrameSettings file to use instead of the font lib")
+    parser.add_argument("--glyphs", nargs = "*", help = "glyph names or wildcard patterns to proof (default: all)")
+    parser.add_argument("--page-size", choices = sorted(PAGE_SIZES), default = "A4")
+    parser.add_argument("--columns", type = int, default = 6)
+    parser.add_argument("--rows", type = int, default = 8)
+    parser.add_argument("--workers", type = int, default = 1, help = "number of page rendering processes")
+    options = parser.parse_args(args)
+
+    settings = None
+    if options.settings:
+        with open(options.settings, 'r', encoding = "utf-8") as file:
+            settings = json.load(file)
+
+    glyphNames = None
+    if options.glyphs:
+        allGlyphNames = sorted(designFrameUFO.openFont(options.ufo).getGlyphSet().keys())
+        glyphNames = (name for name in allGlyphNames if any(fnmatch.fnmatchcase(name, pattern) for pattern in options.glyphs))
+
+    fmt = "svg" if options.output.lower().endswith(".svg") else "pdf"
+    layout = ProofLayout(PAGE_SIZES[options.page_size], options.columns, options.rows)
+    pages = proofPages(options.ufo, fmt, layout, glyphNames, settings, options.workers)
+    count = writeProof(pages, options.output, fmt, layout)
+    sys.stderr.write(f"{count} pages written\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Vectorized classification of on-curve points against the design frame.
+
+Edges are computed once per frame settings with `proximityEdges`, then
+`classifyPoints` checks all the points of a glyph at once. `GuideIndex`
+finds the frame line nearest to a point by bisection, for hover readouts.
+"""
+
+from bisect import bisect_left
+
+import numpy as np
+
+import designFrameGeometry
+
+ON_FRAME = 1
+NEAR_OVERSHOOT = 2
+NEAR_SECOND_LINE = 4
+
+def proximityEdges(designFrame) -> dict:
+    """
+    Returns the edges of the character face, of the overshoot band and
+    the second lines of `designFrame`, shifted in glyph coordinates.
+    """
+    x, y, w, h = designFrameGeometry.getEmRatioFrame(designFrame.characterFace, *designFrame.em_Dimension)
+    outside, inside = designFrame.overshoot
+    shiftX, shiftY = designFrame.shift
+    x += shiftX
+    y += shiftY
+    edges = {
+        "faceX": np.array([x, x + w], dtype=float),
+        "faceY": np.array([y, y + h], dtype=float),
+        # overshoot band edges whose outer side is toward lower / upper values
+        "bandXLow": np.array([x - outside, x + w - inside], dtype=float),
+        "bandXHigh": np.array([x + inside, x + w + outside], dtype=float),
+        "bandYLow": np.array([y - outside, y + h - inside], dtype=float),
+        "bandYHigh": np.array([y + inside, y + h + outside], dtype=float),
+        "secondLineX": np.empty(0),
+        "secondLineY": np.empty(0),
+        }
+    if designFrame.type == "han":
+        horizontal, vertical = designFrameGeometry.secondLinePositions(designFrame)
+        edges["secondLineX"] = np.array(vertical, dtype=float) + shiftX
+        edges["secondLineY"] = np.array(horizontal, dtype=float) + shiftY
+    return edges
+
+def contoursSnapshot(glyph) -> tuple:
+    """
+    Returns the contours of `glyph` as tuples of `(x, y, segmentType)`,
+    `segmentType` being None for off-curve points, the format recorded
+    by `designFramePens.ContourRecordingPointPen`, safe to hand over to
+    another thread.
+    """
+    return tuple(
+        tuple((p.x, p.y, None if p.type == "offcurve" else p.type) for p in c.points) 
+        for c in glyph
+        )
+
+def classifyContours(contours: tuple, edges: dict, tolerance: int = 3) -> tuple:
+    """
+    Returns the on-curve points of `contours` and their `classifyPoints`
+    flags.
+    """
+    points = [(x, y) for contour in contours for x, y, segmentType in contour if segmentType is not None]
+    points = np.array(points, dtype=float).reshape(-1, 2)
+    return points, classifyPoints(points, edges, tolerance)
+
+def _within(values: np.ndarray, edges: np.ndarray, low: float, high: float) -> np.ndarray:
+    if not len(edges):
+        return np.zeros(len(values), dtype=bool)
+    delta = values[:, None] - edges[None, :]
+    return ((low < delta) & (delta < high)).any(axis=1)
+
+def classifyPoints(points: np.ndarray, edges: dict, tolerance: int = 3) -> np.ndarray:
+    """
+    Returns one flag per point of the `(n, 2)` array `points`:
+    `ON_FRAME` for points lying on a character face edge,
+    `NEAR_OVERSHOOT` for points less than `tolerance` outside the overshoot
+    band and `NEAR_SECOND_LINE` for points less than `tolerance` away from
+    a second line without being on it.
+    """
+    flags = np.zeros(len(points), dtype=np.uint8)
+    if not len(points):
+        return flags
+    px, py = points[:, 0], points[:, 1]
+
+    onFrame = np.isin(px, edges["faceX"]) | np.isin(py, edges["faceY"])
+    flags[onFrame] |= ON_FRAME
+
+    nearOvershoot = _within(px, edges["bandXLow"], -tolerance, 0) \
+        | _within(px, edges["bandXHigh"], 0, tolerance) \
+        | _within(py, edges["bandYLow"], -tolerance, 0) \
+        | _within(py, edges["bandYHigh"], 0, tolerance)
+    flags[nearOvershoot & ~onFrame] |= NEAR_OVERSHOOT
+
+    nearSecondLine = (_within(px, edges["secondLineX"], -tolerance, tolerance) \
+        & ~np.isin(px, edges["secondLineX"])) \
+        | (_within(py, edges["secondLineY"], -tolerance, tolerance) \
+        & ~np.isin(py, edges["secondLineY"]))
+    flags[nearSecondLine] |= NEAR_SECOND_LINE
+    return flags
+
+class GuideIndex:
+    """
+    The vertical (`x`) and horizontal (`y`) lines of a design frame,
+    sorted once so the nearest line to a point is found by bisection.
+    """
+
+    def __init__(self, guides):
+        self._positions, self._labels = {"x": [], "y": []}, {"x": [], "y": []}
+        for axis, position, label in sorted(guides, key = lambda guide: (guide[0], guide[1])):
+            self._positions[axis].append(position)
+            self._labels[axis].append(label)
+
+    def __len__(self) -> int:
+        return len(self._positions["x"]) + len(self._positions["y"])
+
+    def nearestOnAxis(self, axis: str, value: float) -> tuple:
+        """
+        Returns the `(distance, position, label)` of the line of `axis`
+        nearest to `value`, the distance being signed, or None.
+        """
+        positions = self._positions[axis]
+        if not positions: return None
+        i = bisect_left(positions, value)
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(positions)]
+        j = min(candidates, key = lambda j: abs(value - positions[j]))
+        return value - positions[j], positions[j], self._labels[axis][j]
+
+    def nearest(self, x: float, y: float) -> dict:
+        """
+        Returns `dict(axis, distance, position, label)` of the line nearest
+        to the point, or None if there is no line.
+        """
+        best = None
+        for axis, value in (("x", x), ("y", y)):
+            found = self.nearestOnAxis(axis, value)
+            if found is not None and (best is None or abs(found[0]) < abs(best["distance"])):
+                best = dict(axis = axis, distance = found[0], position = found[1], label = found[2])
+        return best
+
+def frameGuides(designFrame) -> GuideIndex:
+    """
+    Returns the `GuideIndex` of the em square, character face, overshoot,
+    second line, grid and custom frame lines of `designFrame`, shifted in
+    glyph coordinates.
+    """
+    geometry = designFrameGeometry.frameGeometry(designFrame)
+    edges = proximityEdges(designFrame)
+    shiftX, shiftY = designFrame.shift
+    w, h = designFrame.em_Dimension
+    guides = [
+        ("x", shiftX, "em"), ("x", shiftX + w, "em"),
+        ("y", shiftY, "em"), ("y", shiftY + h, "em"),
+        ]
+    for axis in ("x", "y"):
+        upper = axis.upper()
+        guides.extend((axis, float(p), "face") for p in edges["face" + upper])
+        guides.extend((axis, float(p), "overshoot") for p in edges["band%sLow" % upper])
+        guides.extend((axis, float(p), "overshoot") for p in edges["band%sHigh" % upper])
+        guides.extend((axis, float(p), "second line") for p in edges["secondLine" + upper])
+    guides.extend(("y", start[1] + shiftY, "grid") for start, end in geometry["horizontalGrid"])
+    guides.extend(("x", start[0] + shiftX, "grid") for start, end in geometry["verticalGrid"])
+    for frame, (x, y, fw, fh) in zip(designFrame.customsFrames, geometry["customsFrames"]):
+        label = frame.name or "custom frame"
+        guides.extend([("x", x + shiftX, label), ("x", x + fw + shiftX, label),
+            ("y", y + shiftY, label), ("y", y + fh + shiftY, label)])
+    return GuideIndex(guides)
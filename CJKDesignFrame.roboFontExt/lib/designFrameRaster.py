@@ -0,0 +1,237 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Rasterization of the frame overlay into cached bitmap tiles.
+
+The overlay only depends on the frame settings, so it can be rendered
+once per settings and zoom bucket and blitted behind every glyph. The
+rasterizer works on NumPy arrays and tiles can be encoded as PNG, so all
+of this runs headless, off the main thread.
+"""
+
+import collections
+import os
+import shutil
+import struct
+import tempfile
+import weakref
+import zlib
+
+import numpy as np
+
+import designFrameGeometry
+
+MAX_TILE_PIXELS = 2048
+
+class Tile:
+    """
+    A rasterized overlay: `pixels` is a `(height, width, 4)` RGBA array
+    whose bottom left corner is at `origin` in frame coordinates, each
+    pixel covering `pixelSize` font units.
+    """
+
+    def __init__(self, pixels: np.ndarray, origin: tuple, pixelSize: float):
+        self.pixels = pixels
+        self.origin = origin
+        self.pixelSize = pixelSize
+        self.png = None
+        self.path = None
+
+    @property
+    def size(self) -> tuple:
+        return self.pixels.shape[1], self.pixels.shape[0]
+
+    def encode(self):
+        """
+        Encodes the tile as PNG ahead of `writePNG`, so it can be done
+        off the main thread.
+        """
+        if self.png is None:
+            self.png = encodePNG(self.pixels)
+
+    def writePNG(self, path: str):
+        self.encode()
+        with open(path, "wb") as file:
+            file.write(self.png)
+        self.path = path
+
+    def discard(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+def encodePNG(pixels: np.ndarray) -> bytes:
+    """
+    Encodes a `(height, width, 4)` uint8 RGBA array, top row first, as PNG.
+    """
+    height, width = pixels.shape[:2]
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows[:, 1:] = pixels.reshape(height, width * 4)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    return b"\x89PNG\r\n\x1a\n" \
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)) \
+        + chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)) \
+        + chunk(b"IEND", b"")
+
+def _composite(canvas: np.ndarray, mask: np.ndarray, color: tuple):
+    """
+    Composites `color` (RGBA floats) over the premultiplied float32
+    `canvas` where `mask`.
+    """
+    alpha = color[3]
+    premultiplied = np.array([*(channel * alpha for channel in color[:3]), alpha], dtype=np.float32)
+    canvas[mask] = canvas[mask] * np.float32(1 - alpha) + premultiplied
+
+def _fillMask(contours: tuple, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    Returns the even-odd fill of `contours` sampled at the pixel centers
+    `xs` (width,) and `ys` (height,).
+    """
+    edges = np.array([(x0, y0, x1, y1) for contour in contours 
+        for (x0, y0), (x1, y1) in zip(contour, contour[1:] + contour[:1]) if y0 != y1], dtype=float).reshape(-1, 4)
+    x0, y0, x1, y1 = edges.T
+    # the edges crossing each scanline, and the first pixel right of each crossing
+    rows, indices = np.nonzero((y0 > ys[:, None]) != (y1 > ys[:, None]))
+    xCross = x0[indices] + (ys[rows] - y0[indices]) * (x1[indices] - x0[indices]) / (y1[indices] - y0[indices])
+    columns = np.searchsorted(xs, xCross)
+    # a pixel is inside when an odd number of crossings lie right of it
+    toggles = np.zeros((len(ys), len(xs) + 1), dtype=np.uint8)
+    np.add.at(toggles, (rows, columns), 1)
+    np.bitwise_and(toggles, 1, out = toggles)
+    inside = np.bitwise_xor.accumulate(toggles[:, ::-1], axis=1)[:, ::-1]
+    return inside[:, 1:].view(bool)
+
+def _strokeMask(contours: tuple, origin: tuple, pixelSize: float, shape: tuple) -> np.ndarray:
+    """
+    Returns a mask of one pixel wide strokes along the edges of `contours`.
+    """
+    height, width = shape
+    mask = np.zeros(shape, dtype=bool)
+    ox, oy = origin
+    for contour in contours:
+        for (x0, y0), (x1, y1) in zip(contour, contour[1:] + contour[:1]):
+            steps = int(max(abs(x1 - x0), abs(y1 - y0)) / pixelSize) + 1
+            t = np.linspace(0, 1, steps + 1)
+            columns = np.floor((x0 + (x1 - x0) * t - ox) / pixelSize).astype(int)
+            rows = np.floor((y0 + (y1 - y0) * t - oy) / pixelSize).astype(int)
+            valid = (columns >= 0) & (columns < width) & (rows >= 0) & (rows < height)
+            mask[rows[valid], columns[valid]] = True
+    return mask
+
+def rasterize(displayList: tuple, bounds: tuple, pixelSize: float, styles: dict = designFrameGeometry.STYLES) -> Tile:
+    """
+    Rasterizes the `(style, contours)` entries of `displayList` over
+    `bounds` (xMin, yMin, xMax, yMax) at `pixelSize` font units per pixel.
+    """
+    xMin, yMin, xMax, yMax = bounds
+    width = max(int(np.ceil((xMax - xMin) / pixelSize)) + 1, 1)
+    height = max(int(np.ceil((yMax - yMin) / pixelSize)) + 1, 1)
+    if width > MAX_TILE_PIXELS or height > MAX_TILE_PIXELS:
+        raise ValueError(f"a {width}x{height} tile exceeds {MAX_TILE_PIXELS} pixels")
+    canvas = np.zeros((height, width, 4), dtype=np.float32)
+    xs = xMin + (np.arange(width) + .5) * pixelSize
+    ys = yMin + (np.arange(height) + .5) * pixelSize
+    # one style at a time, only its masks are alive next to the canvas
+    for style, contours in displayList:
+        if not contours: continue
+        fillColor, strokeColor = styles[style]
+        if fillColor:
+            _composite(canvas, _fillMask(contours, xs, ys), fillColor)
+        if strokeColor:
+            _composite(canvas, _strokeMask(contours, (xMin, yMin), pixelSize, (height, width)), strokeColor)
+    # straight to premultiplied-free 8 bit RGBA, top row first, in place
+    canvas = canvas[::-1]
+    alpha = canvas[..., 3:4]
+    np.divide(canvas[..., :3], alpha, out=canvas[..., :3], where=alpha > 0)
+    canvas *= 255
+    np.rint(canvas, out=canvas)
+    return Tile(canvas.astype(np.uint8), (xMin, yMin), pixelSize)
+
+class TileCache:
+    """
+    Least recently used cache of overlay tiles, keyed by settings and zoom
+    bucket. Evicted tiles have their PNG file removed. Without a given
+    `directory`, tiles are written to a temporary directory removed by
+    `close`, or at exit at the latest.
+    """
+
+    def __init__(self, maxSize: int = 8, directory: str = None):
+        self.maxSize = maxSize
+        self.directory = directory
+        self._tiles = collections.OrderedDict()
+        self._removeDirectory = None
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self._tiles
+
+    def get(self, key):
+        """
+        Returns the tile for `key`, None if it was too large or has not
+        been added.
+        """
+        if key not in self._tiles:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._tiles.move_to_end(key)
+        return self._tiles[key]
+
+    def add(self, key, tile: Tile):
+        """
+        Stores `tile` for `key`, writing it to PNG. A None `tile` records
+        that the tile for `key` would be too large.
+        """
+        if tile is not None:
+            if self.directory is None:
+                self.directory = tempfile.mkdtemp(prefix = "CJKDesignFrameTiles-")
+                self._removeDirectory = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors = True)
+            self.written += 1
+            tile.writePNG(os.path.join(self.directory, "tile-%d.png" % self.written))
+        self._tiles[key] = tile
+        while len(self._tiles) > self.maxSize:
+            key, evicted = self._tiles.popitem(last = False)
+            if evicted is not None:
+                evicted.discard()
+
+    def clear(self):
+        for tile in self._tiles.values():
+            if tile is not None:
+                tile.discard()
+        self._tiles.clear()
+
+    def close(self):
+        """
+        Discards every tile and removes the temporary directory, a new one
+        is created if tiles are built again.
+        """
+        self.clear()
+        if self._removeDirectory is not None:
+            self._removeDirectory()
+            self._removeDirectory = None
+            self.directory = None
+
+    def __len__(self) -> int:
+        return len(self._tiles)
@@ -0,0 +1,68 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Coalescing of glyph view redraw requests.
+"""
+
+class RedrawScheduler:
+    """
+    Collapses bursts of redraw requests into at most one call of `redraw`
+    per `interval` (one display refresh by default). `schedule(delay,
+    function)` must call `function` once after `delay` seconds, on the
+    main thread.
+    """
+
+    def __init__(self, redraw, schedule, interval: float = 1 / 60):
+        self.redraw = redraw
+        self.schedule = schedule
+        self.interval = interval
+        self._pending = False
+        self.resetCounters()
+
+    def resetCounters(self):
+        self.requested = 0
+        self.performed = 0
+
+    @property
+    def coalesced(self) -> int:
+        return self.requested - self.performed - self._pending
+
+    @property
+    def pending(self) -> bool:
+        return self._pending
+
+    def request(self):
+        self.requested += 1
+        if self._pending: return
+        self._pending = True
+        self.schedule(self.interval, self._perform)
+
+    def flush(self):
+        if self._pending:
+            self._perform()
+
+    def _perform(self):
+        if not self._pending: return
+        self._pending = False
+        self.performed += 1
+        self.redraw()
+
+    def __str__(self) -> str:
+        return f"requested:{self.requested}, performed:{self.performed}, coalesced:{self.coalesced}"
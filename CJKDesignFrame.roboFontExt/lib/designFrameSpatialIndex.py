@@ -0,0 +1,268 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Font-wide spatial index of on-curve points.
+
+    python designFrameSpatialIndex.py MyFont.ufo --band overshootBottom --tolerance 3
+
+Points are bucketed in a uniform grid stored as NumPy arrays sorted by
+cell, so a query only scans the cells it overlaps. Updated glyphs are
+appended to a small unsorted tail that is merged back when it grows,
+which keeps incremental updates cheap.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import designFrameProximity
+import designFrameUFO
+
+_BIAS = 1 << 20
+_STRIDE = 1 << 21
+
+class PointIndex:
+
+    def __init__(self, cellSize: float = 16, compactRatio: float = .1):
+        self.cellSize = cellSize
+        self.compactRatio = compactRatio
+        self.glyphNames = []
+        self._glyphIds = {}
+        self._xs = np.empty(0)
+        self._ys = np.empty(0)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._keys = np.empty(0, dtype=np.int64)
+        self._tail = []
+        self._alive = np.empty(0, dtype=bool)
+        self._sortedCount = 0
+        self._glyphRows = {}
+
+    def _cell(self, values: np.ndarray) -> np.ndarray:
+        return np.floor(values / self.cellSize).astype(np.int64) + _BIAS
+
+    def _glyphId(self, glyphName: str) -> int:
+        if glyphName not in self._glyphIds:
+            self._glyphIds[glyphName] = len(self.glyphNames)
+            self.glyphNames.append(glyphName)
+        return self._glyphIds[glyphName]
+
+    def setGlyph(self, glyphName: str, points: np.ndarray):
+        """
+        Replaces the points of `glyphName` by the `(n, 2)` array `points`.
+        """
+        self.removeGlyph(glyphName)
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if not len(points): return
+        start = len(self._alive) + sum(len(chunk[0]) for chunk in self._tail)
+        self._tail.append((points[:, 0], points[:, 1], np.full(len(points), self._glyphId(glyphName), dtype=np.int64)))
+        self._glyphRows[glyphName] = np.arange(start, start + len(points))
+        if sum(len(chunk[0]) for chunk in self._tail) > max(len(self._alive) * self.compactRatio, 1024):
+            self.compact()
+
+    def setGlyphs(self, glyphPoints: dict):
+        for glyphName, points in glyphPoints.items():
+            self.setGlyph(glyphName, points)
+        self.compact()
+
+    def removeGlyph(self, glyphName: str):
+        rows = self._glyphRows.pop(glyphName, None)
+        if rows is None: return
+        self._flushTail()
+        self._alive[rows] = False
+
+    def _flushTail(self):
+        if not self._tail: return
+        xs, ys, ids = zip(*self._tail)
+        self._tail = []
+        xs, ys, ids = np.concatenate(xs), np.concatenate(ys), np.concatenate(ids)
+        self._xs = np.concatenate([self._xs, xs])
+        self._ys = np.concatenate([self._ys, ys])
+        self._ids = np.concatenate([self._ids, ids])
+        self._keys = np.concatenate([self._keys, self._cell(ys) * _STRIDE + self._cell(xs)])
+        self._alive = np.concatenate([self._alive, np.ones(len(xs), dtype=bool)])
+
+    def compact(self):
+        """
+        Drops removed points and sorts every point by cell.
+        """
+        self._flushTail()
+        alive = self._alive
+        order = np.argsort(self._keys[alive], kind = "stable")
+        self._xs, self._ys = self._xs[alive][order], self._ys[alive][order]
+        self._ids, self._keys = self._ids[alive][order], self._keys[alive][order]
+        self._alive = np.ones(len(self._xs), dtype=bool)
+        self._sortedCount = len(self._xs)
+        ids, counts = np.unique(self._ids, return_counts = True)
+        order = np.argsort(self._ids, kind = "stable")
+        self._glyphRows = {self.glyphNames[glyphId]: order[start:start + count] for glyphId, start, count in zip(ids.tolist(), np.cumsum(counts) - counts, counts)}
+
+    def __len__(self) -> int:
+        self._flushTail()
+        return int(self._alive.sum())
+
+    def bounds(self) -> tuple:
+        self._flushTail()
+        if not self._alive.any():
+            return None
+        xs, ys = self._xs[self._alive], self._ys[self._alive]
+        return float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max())
+
+    def query(self, xMin: float, yMin: float, xMax: float, yMax: float) -> dict:
+        """
+        Returns `{glyphName: points}` for the points inside the rectangle;
+        infinite sides are clipped to the extent of the index.
+        """
+        self._flushTail()
+        if not len(self._xs):
+            return {}
+        if not np.isfinite([xMin, yMin, xMax, yMax]).all():
+            bounds = self.bounds() or (0, 0, 0, 0)
+            xMin, yMin = max(xMin, bounds[0]), max(yMin, bounds[1])
+            xMax, yMax = min(xMax, bounds[2]), min(yMax, bounds[3])
+        (cx0, cx1), (cy0, cy1) = self._cell(np.array([xMin, xMax])), self._cell(np.array([yMin, yMax]))
+        sorted_ = self._keys[:self._sortedCount]
+        rows = []
+        for cy in range(int(cy0), int(cy1) + 1):
+            low = np.searchsorted(sorted_, cy * _STRIDE + cx0, "left")
+            high = np.searchsorted(sorted_, cy * _STRIDE + cx1, "right")
+            if high > low:
+                rows.append(np.arange(low, high))
+        rows.append(np.arange(self._sortedCount, len(self._xs)))
+        rows = np.concatenate(rows)
+        xs, ys = self._xs[rows], self._ys[rows]
+        inside = self._alive[rows] & (xs >= xMin) & (xs <= xMax) & (ys >= yMin) & (ys <= yMax)
+        rows = rows[inside]
+        result = {}
+        ids = self._ids[rows]
+        for glyphId in np.unique(ids).tolist():
+            selected = rows[ids == glyphId]
+            result[self.glyphNames[glyphId]] = np.stack([self._xs[selected], self._ys[selected]], axis=1)
+        return result
+
+    def glyphsIn(self, rect: tuple) -> list:
+        return sorted(self.query(*rect))
+
+def frameBands(designFrame, tolerance: float = 3) -> dict:
+    """
+    Returns the `(xMin, yMin, xMax, yMax)` band of `tolerance` font units
+    around each edge the drawer uses: the character face, the inner and
+    outer overshoot edges and the second lines, in glyph coordinates.
+    """
+    edges = designFrameProximity.proximityEdges(designFrame)
+    inf = float("inf")
+
+    def vertical(x):
+        return (float(x) - tolerance, -inf, float(x) + tolerance, inf)
+
+    def horizontal(y):
+        return (-inf, float(y) - tolerance, inf, float(y) + tolerance)
+
+    bands = {
+        "faceLeft": vertical(edges["faceX"][0]),
+        "faceRight": vertical(edges["faceX"][1]),
+        "faceBottom": horizontal(edges["faceY"][0]),
+        "faceTop": horizontal(edges["faceY"][1]),
+        "overshootLeft": vertical(edges["bandXLow"][0]),
+        "overshootLeftInside": vertical(edges["bandXHigh"][0]),
+        "overshootRight": vertical(edges["bandXHigh"][1]),
+        "overshootRightInside": vertical(edges["bandXLow"][1]),
+        "overshootBottom": horizontal(edges["bandYLow"][0]),
+        "overshootBottomInside": horizontal(edges["bandYHigh"][0]),
+        "overshootTop": horizontal(edges["bandYHigh"][1]),
+        "overshootTopInside": horizontal(edges["bandYLow"][1]),
+        }
+    for name, x in zip(["secondLineLeft", "secondLineRight"], edges["secondLineX"]):
+        bands[name] = vertical(x)
+    for name, y in zip(["secondLineBottom", "secondLineTop"], edges["secondLineY"]):
+        bands[name] = horizontal(y)
+    return bands
+
+_worker = {}
+
+def _initWorker(path: str):
+    _worker["glyphSet"] = designFrameUFO.openFont(path).getGlyphSet()
+
+def _readChunk(glyphNames: list) -> list:
+    glyphSet = _worker["glyphSet"]
+    return [(name, designFrameUFO.contoursToArray(designFrameUFO.readContours(glyphSet, name), onCurveOnly = True)) for name in glyphNames]
+
+class FontPointIndex:
+    """
+    A `PointIndex` of the on-curve points of a UFO; `refresh` only reads
+    the glyphs whose outline hash changed.
+    """
+
+    def __init__(self, path: str, cellSize: float = 16, workers: int = None, chunkSize: int = 500):
+        self.path = path
+        self.workers = workers
+        self.chunkSize = chunkSize
+        self.index = PointIndex(cellSize)
+        self._hashes = {}
+        self.refresh()
+
+    def _read(self, glyphNames: list) -> list:
+        chunks = [glyphNames[i:i + self.chunkSize] for i in range(0, len(glyphNames), self.chunkSize)]
+        if self.workers == 1 or len(chunks) <= 1:
+            _initWorker(self.path)
+            return [item for chunk in chunks for item in _readChunk(chunk)]
+        with ProcessPoolExecutor(max_workers = self.workers, initializer = _initWorker, initargs = (self.path,)) as executor:
+            return [item for chunk in executor.map(_readChunk, chunks) for item in chunk]
+
+    def refresh(self) -> list:
+        """
+        Re-reads the glyphs modified since the last refresh, returns their
+        names.
+        """
+        glyphSet = designFrameUFO.openFont(self.path).getGlyphSet()
+        hasher = designFrameUFO.GlyphHasher(glyphSet)
+        hashes = {name: hasher.hash(name) for name in glyphSet.keys()}
+        for name in set(self._hashes) - set(hashes):
+            self.index.removeGlyph(name)
+        changed = sorted(name for name, glyphHash in hashes.items() if self._hashes.get(name) != glyphHash)
+        self.index.setGlyphs(dict(self._read(changed)))
+        self._hashes = hashes
+        return changed
+
+def main(args = None) -> int:
+    parser = argparse.ArgumentParser(description = "Find the glyphs with on-curve points along the CJK design frame edges.")
+    parser.add_argument("ufo", help = "path of the UFO")
+    parser.add_argument("--band", nargs = "*", help = "band names (default: all), see frameBands")
+    parser.add_argument("--rect", nargs = 4, type = float, metavar = ("XMIN", "YMIN", "XMAX", "YMAX"), help = "query a rectangle instead")
+    parser.add_argument("--tolerance", type = float, default = 3, help = "band half width in FU (default: 3)")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "number of worker processes")
+    options = parser.parse_args(args)
+
+    fontIndex = FontPointIndex(options.ufo, workers = options.workers)
+    if options.rect:
+        queries = {"rect": tuple(options.rect)}
+    else:
+        designFrame = designFrameUFO.readDesignFrame(designFrameUFO.openFont(options.ufo))
+        bands = frameBands(designFrame, options.tolerance)
+        queries = {name: bands[name] for name in (options.band or bands)}
+    for name, rect in queries.items():
+        sys.stdout.write(json.dumps(dict(band = name, glyphs = fontIndex.index.glyphsIn(rect))) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Opt-in timing of the drawing phases and observer callbacks.
+"""
+
+import functools
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+class _Phase:
+
+    __slots__ = "timer", "name", "start"
+
+    def __init__(self, timer, name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+
+class _NoPhase:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+_noPhase = _NoPhase()
+
+class PhaseTimer:
+    """
+    Keeps the last `size` durations of each named phase in a ring buffer.
+    While disabled, `phase` and `timed` cost one attribute lookup.
+    """
+
+    def __init__(self, size: int = 512, enabled: bool = False):
+        self.size = size
+        self.enabled = enabled
+        self._samples = {}
+
+    def add(self, name: str, seconds: float):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen = self.size)
+        samples.append(seconds)
+
+    def phase(self, name: str):
+        """
+        Returns a context manager timing its block as `name`.
+        """
+        if not self.enabled:
+            return _noPhase
+        return _Phase(self, name)
+
+    def timed(self, name: str = None):
+        """
+        Decorator timing each call of the function as `name`, by default
+        its qualified name, such as `DesignFrameSettings.callback`.
+        """
+        def decorator(function):
+            phaseName = name or function.__qualname__
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.add(phaseName, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        self._samples.clear()
+
+    def statistics(self) -> dict:
+        """
+        Returns `{phase: dict(count, p50, p95, max)}`, durations in
+        milliseconds.
+        """
+        statistics = {}
+        for name, samples in sorted(self._samples.items()):
+            if not samples: continue
+            values = np.fromiter(samples, dtype = float, count = len(samples)) * 1000
+            p50, p95 = np.percentile(values, [50, 95])
+            statistics[name] = dict(count = len(values), p50 = float(p50), p95 = float(p95), max = float(values.max()))
+        return statistics
+
+    def dump(self, path: str):
+        with open(path, 'w', encoding = "utf-8") as file:
+            json.dump(self.statistics(), file, indent = 2)
+
+    def __str__(self) -> str:
+        return "\n".join(
+            f"{name}: p50 {s['p50']:.3f} ms, p95 {s['p95']:.3f} ms, max {s['max']:.3f} ms ({s['count']})"
+            for name, s in self.statistics().items()
+            )
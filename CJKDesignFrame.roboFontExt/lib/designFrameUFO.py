@@ -0,0 +1,151 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Headless access to UFO sources, built on fontTools.ufoLib.
+"""
+
+import hashlib
+import os
+import plistlib
+import re
+
+import numpy as np
+from fontTools.ufoLib import UFOReader
+
+from designFrame import SETTINGS_KEY, designFrameFromLib
+from designFramePens import ContourRecordingPointPen, GlyphAttributes
+
+def openFont(path: str) -> UFOReader:
+    return UFOReader(path, validate = False)
+
+def readSettings(reader: UFOReader) -> dict:
+    return reader.readLib().get(SETTINGS_KEY, {})
+
+def writeSettings(path: str, settings: dict):
+    """
+    Stores `settings` in the lib of the UFO at `path`, keeping the other
+    lib keys.
+    """
+    libPath = os.path.join(path, "lib.plist")
+    lib = {}
+    if os.path.exists(libPath):
+        with open(libPath, "rb") as file:
+            lib = plistlib.load(file)
+    lib[SETTINGS_KEY] = settings
+    temporaryPath = libPath + ".tmp"
+    with open(temporaryPath, "wb") as file:
+        plistlib.dump(lib, file)
+    os.replace(temporaryPath, libPath)
+
+def readDesignFrame(reader: UFOReader):
+    return designFrameFromLib(readSettings(reader))
+
+def readContours(glyphSet, glyphName: str) -> list:
+    pen = ContourRecordingPointPen(glyphSet)
+    glyphSet.readGlyph(glyphName, GlyphAttributes(), pen)
+    return pen.contours
+
+def drawContours(contours: list, pointPen):
+    """
+    Replays contours recorded by `ContourRecordingPointPen` into `pointPen`.
+    """
+    for contour in contours:
+        pointPen.beginPath()
+        for x, y, segmentType in contour:
+            pointPen.addPoint((x, y), segmentType)
+        pointPen.endPath()
+
+def contoursToArray(contours: list, onCurveOnly: bool = False) -> np.ndarray:
+    """
+    Returns the points of `contours` as a `(n, 2)` array.
+    """
+    points = [(x, y) for contour in contours for x, y, segmentType in contour 
+        if segmentType is not None or not onCurveOnly]
+    return np.array(points, dtype=float).reshape(-1, 2)
+
+_outlinePattern = re.compile(rb"<outline\s*/>|<outline>.*?</outline>", re.S)
+_componentPattern = re.compile(rb'<component\b[^>]*?\sbase="([^"]+)"')
+
+class GlyphHasher:
+    """
+    Hashes the outline of each glyph of a glyph set, straight from its
+    .glif data. The hash of a composite glyph includes the hashes of its
+    base glyphs, so editing a base glyph changes the hash of its
+    composites too.
+    """
+
+    def __init__(self, glyphSet):
+        self.glyphSet = glyphSet
+        self._outlines = {}
+        self._hashes = {}
+
+    def _outline(self, glyphName: str) -> tuple:
+        if glyphName not in self._outlines:
+            glif = self.glyphSet.getGLIF(glyphName)
+            match = _outlinePattern.search(glif)
+            outline = match.group(0) if match else b""
+            self._outlines[glyphName] = outline, tuple(b.decode("utf-8") for b in _componentPattern.findall(outline))
+        return self._outlines[glyphName]
+
+    def components(self, glyphName: str) -> tuple:
+        return self._outline(glyphName)[1]
+
+    def hash(self, glyphName: str, _visiting: set = None) -> str:
+        if glyphName in self._hashes:
+            return self._hashes[glyphName]
+        _visiting = _visiting or set()
+        _visiting.add(glyphName)
+        outline, components = self._outline(glyphName)
+        digest = hashlib.sha1(outline)
+        for baseGlyphName in components:
+            if baseGlyphName in _visiting or baseGlyphName not in self.glyphSet: continue
+            digest.update(self.hash(baseGlyphName, _visiting).encode("ascii"))
+        self._hashes[glyphName] = digest.hexdigest()
+        return self._hashes[glyphName]
+
+    def forget(self, glyphNames):
+        """
+        Drops the cached hashes of `glyphNames` and of every composite
+        glyph using them.
+        """
+        dirty = set(glyphNames)
+        for glyphName in dirty:
+            self._outlines.pop(glyphName, None)
+        changed = True
+        while changed:
+            changed = False
+            for glyphName, (outline, components) in self._outlines.items():
+                if glyphName not in dirty and dirty.intersection(components):
+                    dirty.add(glyphName)
+                    changed = True
+        for glyphName in dirty:
+            self._hashes.pop(glyphName, None)
+        return dirty
+
+def glyphsDirectory(path: str) -> str:
+    return os.path.join(path, "glyphs")
+
+def readGlyphFileNames(path: str) -> dict:
+    """
+    Returns the `{fileName: glyphName}` mapping of the default layer.
+    """
+    with open(os.path.join(glyphsDirectory(path), "contents.plist"), "rb") as file:
+        contents = plistlib.load(file)
+    return {fileName: glyphName for glyphName, fileName in contents.items()}
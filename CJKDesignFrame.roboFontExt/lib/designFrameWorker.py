@@ -0,0 +1,107 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Background analysis of glyph snapshots.
+"""
+
+import threading
+import traceback
+from collections import OrderedDict
+
+class AnalysisJob:
+
+    __slots__ = "owner", "function", "args", "callback", "cancelled"
+
+    def __init__(self, owner, function, args: tuple, callback):
+        self.owner = owner
+        self.function = function
+        self.args = args
+        self.callback = callback
+        self.cancelled = False
+
+class AnalysisWorker:
+    """
+    Runs analysis functions on one background thread, in submission
+    order. There is at most one job per `owner`: a new job cancels the
+    previous one. A finished job calls its callback through `post(function,
+    *args)`, which must call `function` on the main thread; a job stays
+    cancellable until then, and cancelled jobs never call back. The functions only get snapshots, never font objects.
+    """
+
+    def __init__(self, post):
+        self.post = post
+        self._condition = threading.Condition()
+        self._jobs = OrderedDict()
+        self._running = {}
+        self._thread = None
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+
+    def submit(self, owner, function, args: tuple, callback) -> AnalysisJob:
+        job = AnalysisJob(owner, function, args, callback)
+        with self._condition:
+            self._cancel(owner)
+            self._jobs[owner] = job
+            self.submitted += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target = self._run, name = "CJKDesignFrameAnalysis", daemon = True)
+                self._thread.start()
+            self._condition.notify()
+        return job
+
+    def _cancel(self, owner):
+        for job in (self._jobs.pop(owner, None), self._running.get(owner)):
+            if job is not None and not job.cancelled:
+                job.cancelled = True
+                self.cancelled += 1
+
+    def cancel(self, owner):
+        with self._condition:
+            self._cancel(owner)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._jobs:
+                    self._condition.wait()
+                owner, job = self._jobs.popitem(last = False)
+                self._running[owner] = job
+            try:
+                result = job.function(*job.args)
+            except Exception:
+                traceback.print_exc()
+                job.cancelled = True
+            if job.cancelled:
+                self._forget(job)
+            else:
+                self.post(self._deliver, job, result)
+
+    def _forget(self, job: AnalysisJob):
+        with self._condition:
+            if self._running.get(job.owner) is job:
+                del self._running[job.owner]
+
+    def _deliver(self, job: AnalysisJob, result):
+        # the job stays running until here, so it can still be cancelled
+        self._forget(job)
+        if job.cancelled: return
+        self.completed += 1
+        job.callback(result)
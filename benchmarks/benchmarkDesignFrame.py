@@ -0,0 +1,287 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Headless benchmarks of the design frame drawer and settings pipeline.
+
+    python benchmarks/benchmarkDesignFrame.py [--repeat 200] [--json results.json]
+
+RoboFont, AppKit and vanilla are replaced by the recording stand-ins of
+`recordingStubs`; NumPy is required. For each scenario the mean latency,
+the memory blocks allocated and the drawing calls per run are reported.
+The startup scenarios run in new interpreters and report the modules
+imported instead of the memory blocks.
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+LIB_PATH = os.path.join(BENCHMARKS_PATH, os.pardir, "CJKDesignFrame.roboFontExt", "lib")
+sys.path.insert(0, BENCHMARKS_PATH)
+sys.path.insert(0, LIB_PATH)
+
+import recordingStubs
+recordingStubs.install()
+
+import designFrameController
+import designFrameCoverage
+import designFrameGeometry
+from designFrame import designFrameFromLib
+import designFrameProximity
+
+def syntheticGlyph(pointCount: int, designFrame, name: str = "synthetic"):
+    """
+    Returns a glyph of `pointCount` on-curve points spread over rings
+    crossing the character face, the overshoot band and the second lines.
+    """
+    w, h = designFrame.em_Dimension
+    points = []
+    for i in range(pointCount):
+        angle = 2 * math.pi * i / max(pointCount, 1)
+        radius = (.3 + .2 * (i % 7) / 6) * min(w, h)
+        points.append(recordingStubs.Point(round(w / 2 + radius * math.cos(angle)), round(h / 2 + radius * math.sin(angle))))
+    contours = [recordingStubs.Contour(points[i:i + 50]) for i in range(0, len(points), 50)]
+    return recordingStubs.Glyph(name, contours)
+
+def settingsLib(frameType: str = "han", step: int = 8, customsFrames: int = 0) -> dict:
+    return {
+        "em_Dimension": [1000, 1000],
+        "characterFace": 90,
+        "overshoot": [20, 20],
+        "shift": [0, -120],
+        "horizontalLine": 15 if frameType == "han" else step,
+        "verticalLine": 15 if frameType == "han" else step,
+        "customsFrames": [{"Name": f"Frame{i}", "Value": 50 + i % 50} for i in range(customsFrames)],
+        "type": frameType,
+        }
+
+def measure(function, repeat: int) -> dict:
+    """
+    Runs `function` `repeat` times and returns the mean latency, the
+    allocated memory blocks and the drawing calls per run.
+    """
+    recordingStubs.resetCounters()
+    start = time.perf_counter()
+    for i in range(repeat):
+        function()
+    elapsed = time.perf_counter() - start
+    drawingCalls = sum(recordingStubs.drawingCalls.values()) / repeat
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    function()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    return dict(latency_us = elapsed / repeat * 1e6, allocations = allocations, drawingCalls = drawingCalls)
+
+_startupScript = """
+import json, sys, time
+sys.path[:0] = %r
+import recordingStubs
+recordingStubs.install()
+modules = len(sys.modules)
+start = time.perf_counter()
+import CJKDesignFrame
+launcher = CJKDesignFrame.DesignFrameLauncher()
+launch = time.perf_counter() - start
+launchModules = len(sys.modules) - modules
+start = time.perf_counter()
+launcher.loadController()
+firstToggle = time.perf_counter() - start
+print(json.dumps(dict(launch = launch, launchModules = launchModules, 
+    firstToggle = firstToggle, firstToggleModules = len(sys.modules) - modules - launchModules)))
+"""
+
+def measureStartup(repeat: int) -> dict:
+    """
+    Returns the mean time and modules imported at launch and on the first
+    toggle, each run in a new interpreter.
+    """
+    paths = [BENCHMARKS_PATH, LIB_PATH]
+    runs = [json.loads(subprocess.run([sys.executable, "-c", _startupScript % paths], 
+        capture_output = True, check = True, text = True).stdout) for i in range(repeat)]
+    return {
+        phase: dict(latency_us = sum(run[phase] for run in runs) / repeat * 1e6, 
+            allocations = runs[-1][phase + "Modules"], drawingCalls = 0.)
+        for phase in ("launch", "firstToggle")
+        }
+
+def waitForAnalysis(controller, timeout: float = 10):
+    # results are posted back with callAfter, queued by the stand-ins
+    worker = controller.analysisWorker
+    start = time.perf_counter()
+    while worker.completed + worker.cancelled < worker.submitted and time.perf_counter() - start < timeout:
+        recordingStubs.runScheduled()
+        time.sleep(.001)
+
+def newController(lib: dict):
+    controller = designFrameController.DesignFrameController()
+    controller.currentFont = recordingStubs.Font()
+    controller.designFrame = designFrameFromLib(lib)
+    return controller
+
+def benchmarkDraw():
+    for frameType, steps in [("han", [1]), ("hangul", [1, 5, 10, 20])]:
+        for step in steps:
+            for customsFrames in [0, 10, 100]:
+                lib = settingsLib(frameType, step, customsFrames)
+                controller = newController(lib)
+                name = f"draw {frameType} step={step} customsFrames={customsFrames}"
+                yield name + " cold", lambda controller=controller: (controller.drawer.invalidate(), controller.drawer.draw(None, "draw"))
+                yield name + " warm", lambda controller=controller: controller.drawer.draw(None, "draw")
+
+def benchmarkLevelOfDetail():
+    for step in [10, 20]:
+        controller = newController(settingsLib("hangul", step, 100))
+        for scale, visibleRect in [(8, None), (1, (0, -200, 1200, 1200)), (.1, (400, 300, 120, 80))]:
+            name = f"draw hangul step={step} customsFrames=100 scale={scale} visibleRect={visibleRect}"
+            yield name, lambda controller=controller, scale=scale, visibleRect=visibleRect: \
+                controller.drawer.draw(None, "draw", scale = scale, visibleRect = visibleRect)
+
+def benchmarkRasterizedOverlay():
+    for frameType, step in [("han", 1), ("hangul", 20)]:
+        controller = newController(settingsLib(frameType, step, 100))
+        controller.drawer.rasterizeOverlay = True
+        for scale in [4, 1]:
+            name = f"draw rasterized {frameType} step={step} customsFrames=100 scale={scale}"
+            # cold draws fall back to vectors, the tile is built on the worker
+            yield name + " cold", lambda controller=controller, scale=scale: \
+                (controller.drawer.closeTiles(), controller.drawer.draw(None, "draw", scale = scale))
+            geometry = controller.drawer.geometry()
+            styles = tuple(style for style, path in geometry["displayList"])
+            yield name + " build", lambda geometry=geometry, scale=scale, styles=styles: \
+                designFrameController.buildOverlayTile(geometry, designFrameGeometry.zoomBucket(scale), styles)
+            controller.drawer.draw(None, "draw", scale = scale)
+            waitForAnalysis(controller)
+            yield name + " warm", lambda controller=controller, scale=scale: controller.drawer.draw(None, "draw", scale = scale)
+
+def benchmarkProximity():
+    for frameType in ["han", "hangul"]:
+        controller = newController(settingsLib(frameType))
+        for pointCount in [10, 100, 500, 1000, 5000]:
+            glyph = syntheticGlyph(pointCount, controller.designFrame)
+            for cached in [False, True]:
+                state = designFrameController.GlyphWindowState(controller)
+                state.proximityPoints = True
+                if cached:
+                    state.setGlyph(glyph)
+                    controller.drawer.draw(glyph, "draw", state)
+                    waitForAnalysis(controller)
+                name = f"proximity {frameType} points={pointCount}" + (" cached" if cached else "")
+                yield name, lambda controller=controller, glyph=glyph, state=state: controller.drawer.draw(glyph, "draw", state)
+
+def benchmarkCurveExtrema():
+    for frameType in ["han", "hangul"]:
+        controller = newController(settingsLib(frameType))
+        for pointCount in [100, 1000, 5000]:
+            glyph = syntheticGlyph(pointCount, controller.designFrame)
+            for cached in [False, True]:
+                state = designFrameController.GlyphWindowState(controller)
+                state.curveExtrema = True
+                if cached:
+                    state.setGlyph(glyph)
+                    controller.drawer.draw(glyph, "draw", state)
+                    waitForAnalysis(controller)
+                name = f"curve extrema {frameType} points={pointCount}" + (" cached" if cached else "")
+                yield name, lambda controller=controller, glyph=glyph, state=state: controller.drawer.draw(glyph, "draw", state)
+
+def benchmarkInkCoverage():
+    for step in [4, 8]:
+        controller = newController(settingsLib("hangul", step))
+        cells = controller.drawer.geometry()["coverageCells"]
+        for pointCount in [100, 1000, 5000]:
+            glyph = syntheticGlyph(pointCount, controller.designFrame)
+            contours = designFrameCoverage.glyphSnapshot(glyph)
+            name = f"ink coverage hangul step={step} points={pointCount}"
+            yield name + " compute", lambda contours=contours, cells=cells: designFrameCoverage.glyphCoverage(contours, cells)
+            state = designFrameController.GlyphWindowState(controller)
+            state.inkCoverage = True
+            state.setGlyph(glyph)
+            controller.drawer.draw(glyph, "draw", state)
+            waitForAnalysis(controller)
+            yield name + " draw cached", lambda controller=controller, glyph=glyph, state=state: controller.drawer.draw(glyph, "draw", state)
+
+def benchmarkHover():
+    for frameType, step, customsFrames in [("han", 1, 0), ("hangul", 20, 100)]:
+        controller = newController(settingsLib(frameType, step, customsFrames))
+        name = f"hover {frameType} step={step} customsFrames={customsFrames}"
+        yield name + " guides", lambda controller=controller: designFrameProximity.frameGuides(controller.designFrame)
+        guides = controller.drawer.geometry()["guides"]
+        state = designFrameController.GlyphWindowState(controller)
+        state.hoverReadout = True
+        points = iter(range(10 ** 9))
+        yield name + " move", lambda state=state, guides=guides, points=points: state.hoverAt(next(points) % 1000, 333, guides)
+        yield name + " draw", lambda controller=controller, state=state: controller.drawer.draw(None, "draw", state)
+
+def benchmarkDesignFrame():
+    for frameType in ["han", "hangul"]:
+        lib = settingsLib(frameType, customsFrames = 10)
+        designFrame = designFrameFromLib(lib)
+        yield f"designFrameFromLib {frameType}", lambda lib=lib: designFrameFromLib(lib)
+        yield f"DesignFrame.get {frameType}", designFrame.get
+
+def benchmarkSettingsCallback():
+    for frameType in ["han", "hangul"]:
+        controller = newController(settingsLib(frameType, customsFrames = 10))
+        settings = designFrameController.DesignFrameSettings(controller)
+        recordingStubs.runScheduled()
+        yield f"DesignFrameSettings.callback {frameType}", lambda settings=settings: settings.callback(None)
+        yield f"DesignFrameSettings.callback {frameType} + scheduled", lambda settings=settings: (settings.callback(None), recordingStubs.runScheduled())
+
+BENCHMARKS = [benchmarkDraw, benchmarkLevelOfDetail, benchmarkRasterizedOverlay, benchmarkProximity, benchmarkCurveExtrema, benchmarkInkCoverage, benchmarkHover, benchmarkDesignFrame, benchmarkSettingsCallback]
+
+def main(args = None) -> int:
+    parser = argparse.ArgumentParser(description = "Benchmark the CJK design frame drawer headless.")
+    parser.add_argument("--repeat", type = int, default = 200, help = "runs per scenario (default: 200)")
+    parser.add_argument("--filter", default = "", help = "only run the scenarios whose name contains this text")
+    parser.add_argument("--json", help = "also write the results to this JSON file")
+    parser.add_argument("--timings", help = "enable the phase timings and write them to this JSON file")
+    options = parser.parse_args(args)
+
+    designFrameController.timings.enabled = bool(options.timings)
+    results = {}
+    print(f"{'scenario':<60} {'latency (us)':>13} {'allocs':>8} {'draw calls':>11}")
+    for benchmark in BENCHMARKS:
+        for name, function in benchmark():
+            if options.filter not in name: continue
+            result = results[name] = measure(function, options.repeat)
+            print(f"{name:<60} {result['latency_us']:>13.1f} {result['allocations']:>8} {result['drawingCalls']:>11.1f}")
+    if "startup" in options.filter or not options.filter:
+        # allocations are the modules imported here
+        for phase, result in measureStartup(max(1, min(options.repeat, 5))).items():
+            name = f"startup {phase}"
+            results[name] = result
+            print(f"{name:<60} {result['latency_us']:>13.1f} {result['allocations']:>8} {result['drawingCalls']:>11.1f}")
+    if options.json:
+        with open(options.json, 'w', encoding = "utf-8") as file:
+            json.dump(results, file, indent = 2)
+    if options.timings:
+        designFrameController.timings.dump(options.timings)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
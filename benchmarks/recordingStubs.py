@@ -0,0 +1,254 @@
+"""
+Copyright 2020 Black Foundry.
+
+This file is part of CJKDesignFrame.
+
+CJKDesignFrame is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+CJKDesignFrame is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with CJKDesignFrame.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Recording stand-ins for the RoboFont, AppKit and vanilla APIs used by the
+extension, so its modules can be imported and timed on plain Python.
+
+`install()` registers the stand-in modules in `sys.modules` and the
+RoboFont builtins (`RGlyph`, `CurrentGlyph`, `CurrentFont`). Every
+drawing call is counted in `drawingCalls`, and every call scheduled with
+`callLater` is queued in `scheduled` until `runScheduled()`.
+"""
+
+import builtins
+import collections
+import sys
+import types
+
+drawingCalls = collections.Counter()
+scheduled = []
+glyphViewUpdates = [0]
+
+def resetCounters():
+    drawingCalls.clear()
+    del scheduled[:]
+    glyphViewUpdates[0] = 0
+
+def runScheduled():
+    while scheduled:
+        delay, function = scheduled.pop(0)
+        function()
+
+# RoboFont objects
+
+class RecordingPen:
+
+    def __init__(self, glyph):
+        self.glyph = glyph
+
+    def moveTo(self, point):
+        self.glyph.contours.append([point])
+
+    def lineTo(self, point):
+        self.glyph.contours[-1].append(point)
+
+    def curveTo(self, *points):
+        self.glyph.contours[-1].extend(points)
+
+    def qCurveTo(self, *points):
+        self.glyph.contours[-1].extend(points)
+
+    def closePath(self):
+        pass
+
+    endPath = closePath
+
+class RGlyph:
+
+    def __init__(self):
+        self.contours = []
+        self.name = None
+
+    def getPen(self):
+        return RecordingPen(self)
+
+    def round(self):
+        self.contours = [[(round(x), round(y)) for x, y in contour] for contour in self.contours]
+
+class Point:
+
+    __slots__ = "x", "y", "type"
+
+    def __init__(self, x, y, type = "line"):
+        self.x, self.y, self.type = x, y, type
+
+class Contour:
+
+    def __init__(self, points):
+        self.points = points
+
+    def drawPoints(self, pointPen):
+        pointPen.beginPath()
+        for point in self.points:
+            pointPen.addPoint((point.x, point.y), None if point.type == "offcurve" else point.type)
+        pointPen.endPath()
+
+class Glyph:
+
+    def __init__(self, name, contours):
+        self.name = name
+        self.contours = contours
+        self.components = []
+        self.layer = None
+
+    def naked(self):
+        return self
+
+    def __iter__(self):
+        return iter(self.contours)
+
+    def addObserver(self, observer, methodName, notification):
+        pass
+
+    def removeObserver(self, observer, notification):
+        pass
+
+class Lib(dict):
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def __setitem__(self, key, value):
+        self.writes += 1
+        super().__setitem__(key, value)
+
+class Font:
+
+    def __init__(self):
+        self.lib = Lib()
+
+    def naked(self):
+        return self
+
+currentGlyph = [None]
+currentFont = [Font()]
+
+# mojo.drawingTools
+
+def _drawingCall(name):
+    def call(*args, **kwargs):
+        drawingCalls[name] += 1
+    call.__name__ = name
+    return call
+
+_drawingTools = ["save", "restore", "fill", "stroke", "strokeWidth", "translate", "scale", 
+    "drawGlyph", "rect", "oval", "line", "newPath", "moveTo", "lineTo", "closePath", "drawPath", "image", "text", "fontSize"]
+
+# vanilla
+
+class Widget:
+
+    def __init__(self, posSize = None, *args, **kwargs):
+        self._posSize = posSize
+        self._value = kwargs.get("value")
+        if self._value is None and args and not isinstance(args[0], str):
+            self._value = args[0]
+        self._callback = kwargs.get("callback") or kwargs.get("editCallback")
+        self._visible = True
+
+    def get(self):
+        if isinstance(self._value, list):
+            return list(self._value)
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+    def show(self, value):
+        self._visible = value
+
+    def append(self, item):
+        self._value.append(item)
+
+    def getSelection(self):
+        return []
+
+    def bind(self, event, callback):
+        pass
+
+    def open(self):
+        pass
+
+    def select(self):
+        pass
+
+    def setTitle(self, title):
+        pass
+
+    def close(self):
+        pass
+
+    def getNSTextField(self):
+        return _NSObject()
+
+    getNSButton = getNSTextField
+
+class _NSObject:
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: _NSObject()
+
+    def __call__(self, *args, **kwargs):
+        return _NSObject()
+
+_vanillaNames = ["Window", "FloatingWindow", "HUDFloatingWindow", "Group", "TextBox", "EditText", 
+    "Slider", "SliderListCell", "List", "Button", "SquareButton", "SegmentedButton", "CheckBox", "PopUpButton"]
+
+def _module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+def _callLater(delay, function, *args, **kwargs):
+    scheduled.append((delay, lambda: function(*args, **kwargs)))
+
+def _updateCurrentGlyphView():
+    glyphViewUpdates[0] += 1
+
+def install():
+    if "mojo" in sys.modules and getattr(sys.modules["mojo"], "__recording__", False):
+        return
+    drawingTools = {name: _drawingCall(name) for name in _drawingTools}
+    drawingTools["__all__"] = list(drawingTools)
+    vanilla = {name: type(name, (Widget,), {}) for name in _vanillaNames}
+    vanilla["__all__"] = list(vanilla)
+
+    _module("mojo", __recording__ = True)
+    _module("mojo.events", addObserver = lambda *args: None, removeObserver = lambda *args: None, postEvent = lambda *args, **kwargs: None)
+    _module("mojo.extensions", getExtensionDefault = lambda key, fallback = None: fallback, setExtensionDefault = lambda key, value: None)
+    _module("mojo.UI", UpdateCurrentGlyphView = _updateCurrentGlyphView, CurrentGlyphWindow = lambda: None, AllGlyphWindows = lambda: [])
+    _module("mojo.canvas", CanvasGroup = type("CanvasGroup", (Widget,), {}))
+    _module("mojo.drawingTools", **drawingTools)
+    _module("AppKit", NSImage = _NSObject(), NumberFormatter = _NSObject, NSColor = _NSObject(), 
+        NSGraphicsContext = type("NSGraphicsContext", (), {"currentContext": staticmethod(lambda: None)}))
+    _module("Quartz", CGContextGetClipBoundingBox = lambda context: ((0, 0), (0, 0)))
+    _module("vanilla", **vanilla)
+    _module("vanilla.dialogs", putFile = lambda *args, **kwargs: None, getFile = lambda *args, **kwargs: None, message = lambda *args, **kwargs: None)
+    _module("lib")
+    _module("lib.UI")
+    _module("lib.UI.toolbarGlyphTools", ToolbarGlyphTools = Widget)
+    _module("PyObjCTools")
+    _module("PyObjCTools.AppHelper", callLater = _callLater, callAfter = lambda function, *args, **kwargs: _callLater(0, function, *args, **kwargs))
+
+    builtins.RGlyph = RGlyph
+    builtins.CurrentGlyph = lambda: currentGlyph[0]
+    builtins.CurrentFont = lambda: currentFont[0]